@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from urllib.parse import quote as url_quote
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from metrics import QUOTE_REQUEST_SECONDS, QUOTE_REQUESTS, QUOTE_RETRIES
+from quote_parser import COLUMNS, QuoteRow, parse_quote
+from rate_control import THROTTLE_STATUSES, AdaptiveRateController, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+NSE_BASE_URL = "https://www.nseindia.com"
+QUOTE_PATH = "/api/quote-equity?symbol={symbol}"
+MAX_IN_FLIGHT = 64    # Ceiling for the adaptive concurrency limit
+RETRIES = 2           # Retry failed requests this many times
+THROTTLE_RETRIES = 5  # Further retries for throttled requests, which do not use up RETRIES
+THROTTLE_BACKOFF = 0.5  # Base seconds of the backoff after a throttled response
+REQUEST_TIMEOUT = 10  # Seconds per quote request
+
+HEADERS = {
+    'Connection': 'keep-alive',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.79 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9,hi;q=0.8',
+    'Referer': 'https://www.nseindia.com/get-quotes/equity',
+}
+
+
+class QuoteBuffer:
+    """Preallocated columnar storage for one sweep, indexed by symbol position.
+
+    Prices land in a Fortran-ordered float64 matrix (so each column is
+    contiguous) and ``valid`` marks which positions were fetched.
+    ``to_frame()`` wraps the column arrays without copying when every fetch
+    succeeded and otherwise does a single masked copy.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.values = np.full((len(self.symbols), len(COLUMNS) - 1), np.nan, order='F')
+        self.valid = np.zeros(len(self.symbols), dtype=bool)
+
+    def record(self, position: int, row: QuoteRow):
+        self.values[position] = row[1:]
+        self.valid[position] = True
+
+    @property
+    def count(self) -> int:
+        return int(self.valid.sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        if self.valid.all():
+            symbols, values = self.symbols, self.values
+        else:
+            symbols, values = self.symbols[self.valid], np.asfortranarray(self.values[self.valid])
+        columns = {'SYMBOL': symbols}
+        columns.update((name, values[:, i]) for i, name in enumerate(COLUMNS[1:]))
+        return pd.DataFrame(columns, copy=False)
+
+
+class AsyncQuoteFetcher:
+    """Fetch NSE quotes concurrently over one keep-alive aiohttp session.
+
+    ``base_url`` can point at a local stub server that serves the
+    ``QUOTE_PATH`` route, which is how the fetcher is exercised offline.
+    Request pacing comes from ``controller``; pass a long-lived one so the
+    learned rate carries over between sweeps. An optional ``cache``
+    (``QuoteCache``) answers fresh symbols locally and revalidates expired
+    ones with conditional requests.
+    """
+
+    def __init__(self, base_url: str = NSE_BASE_URL, max_in_flight: int = MAX_IN_FLIGHT,
+                 retries: int = RETRIES, timeout: float = REQUEST_TIMEOUT,
+                 controller: AdaptiveRateController = None, cache=None,
+                 throttle_retries: int = THROTTLE_RETRIES):
+        self.base_url = base_url.rstrip('/')
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.throttle_retries = throttle_retries
+        self.timeout = timeout
+        self.controller = controller or AdaptiveRateController(
+            concurrency=min(32, max_in_flight), max_concurrency=max_in_flight)
+        self.cache = cache
+        self.session: aiohttp.ClientSession = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_in_flight,
+            limit_per_host=self.max_in_flight,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        await self._warm_up()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def _warm_up(self):
+        """Visit the landing page once so the cookie jar holds NSE's session cookies"""
+        try:
+            async with self.session.get(self.base_url + '/') as response:
+                await response.read()
+        except Exception as e:
+            logger.warning(f"Session warm-up failed: {str(e)}")
+
+    async def fetch_symbol(self, sym: str) -> QuoteRow:
+        """Fetch one quote row, or None once all retries are exhausted.
+
+        A throttled response is a signal to slow down rather than a failure:
+        it is retried after a longer backoff, paced by the controller that
+        has just cut its rate, without using up the ordinary retries.
+        """
+        if self.cache is not None:
+            row = self.cache.get(sym)
+            if row is not None:
+                QUOTE_REQUESTS.inc(outcome='cache_hit')
+                return row
+        url = self.base_url + QUOTE_PATH.format(symbol=url_quote(sym, safe=''))
+        failures = throttles = 0
+        while True:
+            try:
+                headers = self.cache.validators(sym) if self.cache is not None else None
+                async with self.controller.slot() as outcome:
+                    started = time.perf_counter()
+                    async with self.session.get(url, headers=headers) as response:
+                        outcome['throttled'] = response.status in THROTTLE_STATUSES
+                        response.raise_for_status()
+                        if response.status == 304 and self.cache is not None:
+                            row = self.cache.revalidated(sym)
+                        else:
+                            row = parse_quote(sym, await response.read())
+                            if self.cache is not None:
+                                self.cache.put(sym, row, response.headers.get('ETag'),
+                                               response.headers.get('Last-Modified'))
+                    outcome['ok'] = True
+                    QUOTE_REQUEST_SECONDS.observe(time.perf_counter() - started)
+                    QUOTE_REQUESTS.inc(outcome='not_modified' if response.status == 304 else 'ok')
+                return row
+            except Exception as e:
+                logger.warning(f"Attempt {failures + throttles + 1} failed for {sym}: {str(e)}")
+                throttled = getattr(e, 'status', None) in THROTTLE_STATUSES
+                QUOTE_REQUESTS.inc(outcome='throttled' if throttled else 'error')
+                if throttled:
+                    throttles += 1
+                    if throttles > self.throttle_retries:
+                        return None
+                    delay = backoff_delay(throttles, base=THROTTLE_BACKOFF)
+                else:
+                    failures += 1
+                    if failures >= self.retries:
+                        return None
+                    delay = backoff_delay(failures - 1)
+                QUOTE_RETRIES.inc()
+                await asyncio.sleep(delay)
+
+    async def fetch_many(self, symbols, on_result=None) -> QuoteBuffer:
+        """Fetch every symbol into a QuoteBuffer, calling ``on_result(row)`` as each quote lands.
+
+        ``on_result`` runs on the event loop, so it must not block. A failure
+        for one symbol (parsing, recording or the callback) is logged and
+        never aborts the rest of the sweep.
+        """
+        buffer = QuoteBuffer(symbols)
+
+        async def fetch_into(position, sym):
+            try:
+                row = await self.fetch_symbol(sym)
+                if not row:
+                    return
+                buffer.record(position, row)
+            except Exception as e:
+                logger.error(f"Error fetching {sym}: {str(e)}")
+                return
+            if on_result is not None:
+                try:
+                    on_result(row)
+                except Exception as e:
+                    logger.error(f"Result callback failed for {sym}: {str(e)}")
+
+        await asyncio.gather(*(fetch_into(i, sym) for i, sym in enumerate(buffer.symbols)),
+                             return_exceptions=True)
+        return buffer
+
+
+async def _fetch_quotes(symbols, on_result=None, **kwargs):
+    async with AsyncQuoteFetcher(**kwargs) as fetcher:
+        return await fetcher.fetch_many(symbols, on_result=on_result)
+
+
+def fetch_quotes(symbols, on_result=None, **kwargs) -> QuoteBuffer:
+    """Blocking entry point: run a full sweep on a private event loop"""
+    started = time.perf_counter()
+    buffer = asyncio.run(_fetch_quotes(symbols, on_result=on_result, **kwargs))
+    logger.info(f"Fetched {buffer.count}/{len(symbols)} quotes in {time.perf_counter() - started:.2f}s")
+    return buffer
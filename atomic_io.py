@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# path -> ((st_ino, st_mtime_ns, st_size), digest) of the file as this process last saw it
+_last_digests: Dict[str, Tuple[tuple, str]] = {}
+_digest_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive cross-process lock on ``<path>.lock`` for the duration of the block"""
+    with open(f"{path}.lock", 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _stat_key(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _file_digest(path: str):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write_bytes(path: str, payload: bytes, skip_unchanged: bool = True) -> bool:
+    """Replace ``path`` with ``payload`` via temp file, fsync and rename.
+
+    Only one writer per file runs at a time, across processes. When
+    ``skip_unchanged`` is set and the content hash matches what is already
+    on disk, nothing is written. The cached digest is only trusted while
+    the file's inode, mtime and size are the ones this process last saw, so
+    a file replaced by another process is re-hashed. Returns True if the
+    file was replaced.
+    """
+    digest = hashlib.sha1(payload).hexdigest()
+    with file_lock(path):
+        if skip_unchanged:
+            stat_key = _stat_key(path)
+            if stat_key is not None:
+                with _digest_lock:
+                    cached = _last_digests.get(path)
+                previous = cached[1] if cached and cached[0] == stat_key else _file_digest(path)
+                if previous == digest:
+                    with _digest_lock:
+                        _last_digests[path] = (stat_key, digest)
+                    return False
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _fsync_dir(path)
+        stat_key = _stat_key(path)
+
+    with _digest_lock:
+        _last_digests[path] = (stat_key, digest)
+    return True
+
+
+def _fsync_dir(path: str):
+    if fcntl is None:
+        return  # Directories cannot be opened for fsync on Windows
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_csv(df: pd.DataFrame, path: str, **to_csv_kwargs) -> bool:
+    """``df.to_csv(path)`` that never exposes a half-written file to readers"""
+    to_csv_kwargs.setdefault('index', False)
+    return atomic_write_bytes(path, df.to_csv(**to_csv_kwargs).encode('utf-8'))
@@ -0,0 +1,65 @@
+"""Per-quote parse cost of the quote-equity payloads in benchmarks/payloads.
+
+    python benchmarks/bench_quote_parse.py [--iterations N]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import orjson
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from quote_parser import parse_quote, quote_to_row  # noqa: E402
+
+PAYLOAD_DIR = os.path.join(ROOT, 'benchmarks', 'payloads')
+
+
+def load_payloads():
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(PAYLOAD_DIR, '*.json'))):
+        with open(path, 'rb') as f:
+            # Re-serialise compactly, the way the API sends it
+            payloads.append(orjson.dumps(orjson.loads(f.read())))
+    return payloads
+
+
+def stdlib_dict(raw):
+    return quote_to_row('SYM', json.loads(raw))
+
+
+def orjson_full(raw):
+    return quote_to_row('SYM', orjson.loads(raw))
+
+
+def lean(raw):
+    return parse_quote('SYM', raw)
+
+
+def bench(fn, payloads, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for raw in payloads:
+            fn(raw)
+    return (time.perf_counter() - started) / (iterations * len(payloads)) * 1e6
+
+
+def run(iterations=20000):
+    payloads = load_payloads()
+    results = {name: round(bench(fn, payloads, iterations), 3)
+               for name, fn in (('json_full_decode', stdlib_dict),
+                                ('orjson_full_decode', orjson_full),
+                                ('orjson_price_info_only', lean))}
+    return {'payloads': len(payloads), 'avg_payload_bytes': sum(map(len, payloads)) // len(payloads),
+            'us_per_quote': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
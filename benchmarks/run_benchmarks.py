@@ -0,0 +1,224 @@
+"""Reproducible benchmarks for the fetch -> predict -> persist pipeline.
+
+    python benchmarks/run_benchmarks.py --output bench_report.json
+    python benchmarks/run_benchmarks.py --only predict,io --compare old_report.json
+
+Fetch scenarios run against the local stub in stub_server.py, so no
+network access is needed. The report is JSON; ``--compare`` prints the
+relative change of every timing against an earlier report.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from atomic_io import atomic_write_csv  # noqa: E402
+from fetchNSEdata import fetch_nse_live_data  # noqa: E402
+from mmap_snapshot import MmapSnapshotReader, write_snapshot  # noqa: E402
+from model_registry import load_model  # noqa: E402
+from rate_control import AdaptiveRateController  # noqa: E402
+from scoring import FEATURE_COLUMNS  # noqa: E402
+from stub_server import StubQuoteServer  # noqa: E402
+import bench_quote_parse  # noqa: E402
+
+MODEL_PATH = os.path.join(ROOT, 'profit_prediction_model.pkl')
+SYMBOLS_PATH = os.path.join(ROOT, 'symbols.csv')
+
+
+def timeit(fn, min_time=0.2, max_runs=1000):
+    """Run ``fn`` repeatedly for at least ``min_time`` seconds; return timing stats"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_runs and (len(times) < 3 or time.perf_counter() - started < min_time):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return {'median_ms': round(statistics.median(times) * 1e3, 4),
+            'min_ms': round(min(times) * 1e3, 4), 'runs': len(times)}
+
+
+def synthetic_quotes(n, seed=0):
+    """Quote frame with n rows and plausible OHLC prices"""
+    rng = np.random.default_rng(seed)
+    prev = rng.uniform(10, 5000, n)
+    last = prev * (1 + rng.normal(0, 0.01, n))
+    open_ = prev * (1 + rng.normal(0, 0.005, n))
+    return pd.DataFrame({
+        'SYMBOL': [f"SYM{i:05d}" for i in range(n)],
+        'OPEN': open_,
+        'HIGH': np.maximum.reduce([open_, last, prev]) * 1.005,
+        'LOW': np.minimum.reduce([open_, last, prev]) * 0.995,
+        'PREVCLOSE': prev,
+        'LAST': last,
+    })
+
+
+def bench_fetch(symbol_count, concurrencies, latency, error_rate, throttle_rps):
+    symbols = list(pd.read_csv(SYMBOLS_PATH)['SYMBOL'])[:symbol_count]
+    results = {}
+    with StubQuoteServer(latency=latency, error_rate=error_rate, throttle_rps=throttle_rps) as server:
+        for concurrency in concurrencies:
+            # Fixed concurrency, rate effectively unbounded: measures the fetch engine itself
+            controller = AdaptiveRateController(rate=1e6, max_rate=1e6, concurrency=concurrency,
+                                                min_concurrency=concurrency, max_concurrency=concurrency)
+            results[f"fixed_{concurrency}"] = _fetch_once(server, symbols, concurrency, controller)
+        results['adaptive'] = _fetch_once(server, symbols, max(concurrencies), AdaptiveRateController(
+            max_concurrency=max(concurrencies)))
+        results['stub'] = {'requests': server.requests, 'throttled': server.throttled, 'errors': server.errors}
+    return results
+
+
+def _fetch_once(server, symbols, max_in_flight, controller):
+    started = time.perf_counter()
+    df = fetch_nse_live_data(symbols, max_in_flight=max_in_flight, output_path=None, snapshot_path=None,
+                             base_url=server.base_url, controller=controller)
+    elapsed = time.perf_counter() - started
+    return {'symbols': len(symbols), 'fetched': len(df), 'seconds': round(elapsed, 3),
+            'quotes_per_second': round(len(df) / elapsed, 1), 'controller': controller.metrics()}
+
+
+def bench_predict(row_counts):
+    with open(MODEL_PATH, 'rb') as f:
+        model, engine, _ = load_model(f.read())
+    results = {}
+    for n in row_counts:
+        df = synthetic_quotes(n)
+
+        def baseline():
+            features = df[FEATURE_COLUMNS].fillna(df[FEATURE_COLUMNS].mean())
+            model.predict(features)
+
+        results[f"{n}_rows"] = {
+            'dataframe_predict': timeit(baseline),
+            'scoring_engine': timeit(lambda: engine.score_frame(df)),
+            'closed_form': engine.is_linear,
+        }
+    return results
+
+
+def bench_io(row_counts):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in row_counts:
+            df = synthetic_quotes(n)
+            csv_path = os.path.join(tmp, f"live_{n}.csv")
+            snap_path = os.path.join(tmp, f"live_{n}.snap")
+            frames = [synthetic_quotes(n, seed) for seed in range(2)]
+            counter = iter(range(10 ** 9))
+
+            atomic_write_csv(df, csv_path)
+            write_snapshot(snap_path, df)
+            results[f"{n}_rows"] = {
+                'csv_write_changed': timeit(lambda: atomic_write_csv(frames[next(counter) % 2], csv_path)),
+                'csv_write_unchanged': timeit(lambda: atomic_write_csv(frames[1], csv_path)),
+                'csv_read': timeit(lambda: pd.read_csv(csv_path)),
+                'snapshot_write': timeit(lambda: write_snapshot(snap_path, df)),
+                'snapshot_map': timeit(lambda: MmapSnapshotReader(snap_path).read()),
+                'snapshot_to_frame': timeit(lambda: MmapSnapshotReader(snap_path).read().to_frame()),
+            }
+    return results
+
+
+def collect_timings(report, prefix=''):
+    """Flatten every ``median_ms`` / ``seconds`` / ``us_per_*`` value into {dotted.path: value}"""
+    flat = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(collect_timings(value, f"{path}."))
+        elif isinstance(value, (int, float)) and (key in ('median_ms', 'seconds') or '.us_per' in f".{path}"):
+            flat[path] = value
+    return flat
+
+
+def compare(current, baseline_path, threshold=0.10):
+    with open(baseline_path) as f:
+        baseline = collect_timings(json.load(f)['results'])
+    now = collect_timings(current['results'])
+    regressions = 0
+    for path in sorted(now):
+        if path not in baseline or not baseline[path]:
+            continue
+        change = (now[path] - baseline[path]) / baseline[path]
+        flag = ''
+        if change > threshold:
+            flag = '  <-- slower'
+            regressions += 1
+        print(f"{path:70s} {baseline[path]:>12.4f} -> {now[path]:>12.4f} ({change:+.1%}){flag}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', default='parse,fetch,predict,io',
+                        help='comma-separated scenarios: parse, fetch, predict, io')
+    parser.add_argument('--symbols', type=int, default=2037, help='symbols per fetch sweep')
+    parser.add_argument('--concurrency', default='16,32,64')
+    parser.add_argument('--latency', type=float, default=0.05, help='stub latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rps', type=float, default=None)
+    parser.add_argument('--predict-rows', default='100,2000,50000')
+    parser.add_argument('--io-rows', default='2000,50000')
+    parser.add_argument('--output', default=None, help='write the JSON report here')
+    parser.add_argument('--compare', default=None, help='earlier report to compare against')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    scenarios = set(args.only.split(','))
+    results = {}
+    if 'parse' in scenarios:
+        results['parse'] = bench_quote_parse.run(5000)
+    if 'fetch' in scenarios:
+        results['fetch'] = bench_fetch(args.symbols, [int(c) for c in args.concurrency.split(',')],
+                                       args.latency, args.error_rate, args.throttle_rps)
+    if 'predict' in scenarios:
+        results['predict'] = bench_predict([int(n) for n in args.predict_rows.split(',')])
+    if 'io' in scenarios:
+        results['io'] = bench_io([int(n) for n in args.io_rows.split(',')])
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        sys.exit(1 if compare(report, args.compare) else 0)
+
+
+if __name__ == '__main__':
+    main()
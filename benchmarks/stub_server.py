@@ -0,0 +1,136 @@
+"""Local stand-in for the NSE quote endpoint, used by the benchmarks.
+
+Serves the payloads in benchmarks/payloads on ``/api/quote-equity`` with
+per-symbol prices, configurable latency, random error rate and an
+optional requests-per-second throttle that answers 429 when exceeded.
+"""
+import asyncio
+import glob
+import os
+import random
+import threading
+import time
+import zlib
+
+import orjson
+from aiohttp import web
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payloads')
+
+
+def load_templates():
+    templates = []
+    for path in sorted(glob.glob(os.path.join(PAYLOAD_DIR, '*.json'))):
+        with open(path, 'rb') as f:
+            templates.append(orjson.loads(f.read()))
+    return templates
+
+
+class StubQuoteServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.05,
+                 jitter: float = 0.02, error_rate: float = 0.0, throttle_rps: float = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.templates = load_templates()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._loop = None
+        self._runner = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _payload(self, symbol: str) -> bytes:
+        seed = zlib.crc32(symbol.encode())
+        quote = dict(self.templates[seed % len(self.templates)])
+        base = 50 + seed % 5000
+        drift = random.uniform(-0.02, 0.02)
+        low, high = base * 0.98, base * 1.02
+        quote['priceInfo'] = dict(quote['priceInfo'], open=base, previousClose=round(base * 0.995, 2),
+                                  lastPrice=round(base * (1 + drift), 2),
+                                  intraDayHighLow={'min': round(low, 2), 'max': round(high, 2)})
+        return orjson.dumps(quote)
+
+    def _over_limit(self) -> bool:
+        if not self.throttle_rps:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > self.throttle_rps
+
+    async def _quote(self, request):
+        self.requests += 1
+        if self._over_limit():
+            self.throttled += 1
+            return web.Response(status=429)
+        await asyncio.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503)
+        return web.Response(body=self._payload(request.query.get('symbol', '')),
+                            content_type='application/json')
+
+    async def _home(self, request):
+        return web.Response(text='ok')
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/', self._home)
+        app.router.add_get('/api/quote-equity', self._quote)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._start())
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+
+    def start(self) -> 'StubQuoteServer':
+        threading.Thread(target=self._serve, name='stub-quote-server', daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve stub NSE quotes locally')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rps', type=float, default=None)
+    args = parser.parse_args()
+    server = StubQuoteServer(port=args.port, latency=args.latency, error_rate=args.error_rate,
+                             throttle_rps=args.throttle_rps).start()
+    print(f"Stub quote server on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
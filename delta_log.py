@@ -0,0 +1,152 @@
+import os
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write_bytes, file_lock
+
+MAGIC = b'NSEDLOG1'
+# magic, live checkpoint seq, predictions checkpoint seq, started_at
+LOG_HEADER = struct.Struct('<8sQQd')
+RECORD_MAGIC = b'DREC'
+# magic, kind, seq, published_at, n_rows, n_cols, symbol_width
+RECORD = struct.Struct('<4sBQdIII')
+KINDS = ('live', 'predictions')
+ALIGN = 8
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class DeltaRecord(NamedTuple):
+    kind: str
+    seq: int
+    published_at: float
+    symbols: List[str]
+    values: np.ndarray  # (n_rows, n_cols) float64
+
+
+def encode_record(kind: str, seq: int, df: pd.DataFrame, columns: Sequence[str],
+                  published_at: Optional[float] = None) -> bytes:
+    symbols = np.asarray(df['SYMBOL'], dtype=str).astype(np.bytes_)
+    width = max(symbols.dtype.itemsize, 1)
+    values = np.ascontiguousarray(df[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan))
+    header = RECORD.pack(RECORD_MAGIC, KINDS.index(kind), seq,
+                         time.time() if published_at is None else published_at,
+                         len(df), len(columns), width)
+    body = symbols.astype(f'S{width}').tobytes()
+    padding = b'\0' * (_aligned(RECORD.size + len(body)) - RECORD.size - len(body))
+    return header + body + padding + values.tobytes()
+
+
+def decode_records(data: bytes) -> Tuple[List[DeltaRecord], int]:
+    """Complete records at the start of ``data`` and the number of bytes they span"""
+    records, offset = [], 0
+    while offset + RECORD.size <= len(data):
+        magic, kind, seq, published_at, n_rows, n_cols, width = RECORD.unpack_from(data, offset)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Corrupt delta record at offset {offset}")
+        values_offset = offset + _aligned(RECORD.size + n_rows * width)
+        end = values_offset + n_rows * n_cols * 8
+        if end > len(data):
+            break  # Still being appended
+        symbols = np.frombuffer(data, dtype=f'S{width}', count=n_rows, offset=offset + RECORD.size)
+        values = np.frombuffer(data, dtype=np.float64, count=n_rows * n_cols,
+                               offset=values_offset).reshape(n_rows, n_cols)
+        records.append(DeltaRecord(KINDS[kind], seq, published_at,
+                                   [s.decode('ascii') for s in symbols], values.copy()))
+        offset = end
+    return records, offset
+
+
+def apply_records(df: pd.DataFrame, records: Sequence[DeltaRecord]) -> pd.DataFrame:
+    """Upsert the rows of ``records`` into ``df`` by SYMBOL, later records winning"""
+    columns = list(df.columns[1:])
+    records = [r for r in records if r.values.shape[1] == len(columns)]
+    if not records:
+        return df
+    update = pd.DataFrame(np.concatenate([r.values for r in records]), columns=columns,
+                          index=pd.Index([s for r in records for s in r.symbols], name='SYMBOL'))
+    update = update[~update.index.duplicated(keep='last')]
+    table = df.set_index('SYMBOL')
+    existing = update.index.isin(table.index)
+    table.loc[update.index[existing], columns] = update[existing].to_numpy()
+    return pd.concat([table, update[~existing]]).reset_index()
+
+
+class DeltaLogWriter:
+    """Append-only log of changed rows between full snapshot checkpoints.
+
+    Each record holds only the rows whose values changed, for one snapshot
+    kind. After a checkpoint (full .snap files written) ``start_epoch``
+    atomically replaces the log with an empty one whose header names the
+    checkpoint seqs it builds on, so the log never grows past one
+    checkpoint interval.
+    """
+
+    def __init__(self, path: str = "nse_deltas.bin"):
+        self.path = path
+        self.seq = 0
+        self.bytes_written = 0
+
+    def start_epoch(self, live_seq: int, predictions_seq: int):
+        atomic_write_bytes(self.path, LOG_HEADER.pack(MAGIC, live_seq, predictions_seq, time.time()),
+                           skip_unchanged=False)
+        self.bytes_written = 0
+
+    def append(self, kind: str, df: Optional[pd.DataFrame], columns: Sequence[str]) -> int:
+        """Append the rows of ``df``; returns bytes written (0 for no rows)"""
+        if df is None or df.empty or not os.path.exists(self.path):
+            return 0
+        self.seq += 1
+        payload = encode_record(kind, self.seq, df, columns)
+        with file_lock(self.path):
+            with open(self.path, 'ab') as f:
+                f.write(payload)
+                f.flush()
+        self.bytes_written += len(payload)
+        return len(payload)
+
+
+class DeltaLogReader:
+    """Tail a delta log, yielding only records that were not seen before.
+
+    The header is re-read on every poll: an atomic replace can reuse the
+    previous file's inode, so a changed (seqs, started_at) header is what
+    marks a new epoch.
+    """
+
+    def __init__(self, path: str = "nse_deltas.bin"):
+        self.path = path
+        self.epoch: Optional[Dict[str, int]] = None  # Checkpoint seqs the current log builds on
+        self._header = None
+        self._offset = 0
+
+    def poll(self) -> Tuple[bool, List[DeltaRecord]]:
+        """(whether a new epoch started, records appended since the last poll)"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False, []
+        with f:
+            header = f.read(LOG_HEADER.size)
+            if len(header) < LOG_HEADER.size:
+                return False, []
+            magic, live_seq, predictions_seq, started_at = LOG_HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a delta log")
+            new_epoch = (live_seq, predictions_seq, started_at) != self._header
+            if new_epoch:
+                self._header = (live_seq, predictions_seq, started_at)
+                self._offset = LOG_HEADER.size
+                self.epoch = {'live': live_seq, 'predictions': predictions_seq}
+            elif os.fstat(f.fileno()).st_size == self._offset:
+                return False, []
+            f.seek(self._offset)
+            records, consumed = decode_records(f.read())
+        self._offset += consumed
+        return new_epoch, records
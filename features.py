@@ -0,0 +1,160 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from quote_parser import COLUMNS
+from scoring import FEATURE_COLUMNS
+
+PRICE_COLUMNS = COLUMNS[1:]
+LAGS = (1, 5, 20)  # Ticks back for the rolling returns
+ENGINEERED_COLUMNS = (['RANGE_PCT', 'GAP_PCT'] + [f'RET_{k}' for k in LAGS]
+                      + ['EMA_GAP_PCT', 'ATR_PCT'])
+SERVED_COLUMNS = FEATURE_COLUMNS + ENGINEERED_COLUMNS  # Everything a model may be trained on
+DEFAULT_CONFIG = {'window': 32, 'ema_span': 10, 'atr_span': 14}
+
+_OPEN, _HIGH, _LOW, _PREVCLOSE, _LAST = (PRICE_COLUMNS.index(c)
+                                         for c in ('OPEN', 'HIGH', 'LOW', 'PREVCLOSE', 'LAST'))
+
+
+def needs_rolling(columns: Iterable[str]) -> bool:
+    return any(c in ENGINEERED_COLUMNS for c in columns)
+
+
+def _pct(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den * 100, np.nan)
+
+
+class RollingFeatures:
+    """Rolling technical indicators for every symbol, updated a tick at a time.
+
+    Recent LAST prices are kept in a (symbols x window) ring buffer addressed
+    by universe position, with a write head per symbol since each shard
+    refreshes different symbols. EMA and ATR are exponential, so a tick only
+    touches the rows that moved: a handful of vector operations per update
+    and no Python loop per symbol. ``values`` holds the latest indicators
+    (ENGINEERED_COLUMNS) for every symbol.
+    """
+
+    def __init__(self, window: int = 32, ema_span: int = 10, atr_span: int = 14):
+        if window <= max(LAGS):
+            raise ValueError(f"window must exceed the longest return lag ({max(LAGS)})")
+        self.window = window
+        self.ema_span = ema_span
+        self.atr_span = atr_span
+        self.columns = list(ENGINEERED_COLUMNS)
+        self.universe: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(0)
+
+    @property
+    def config(self) -> Dict[str, int]:
+        return {'window': self.window, 'ema_span': self.ema_span, 'atr_span': self.atr_span}
+
+    def _allocate(self, n: int):
+        self.prices = np.full((n, self.window), np.nan)
+        self.ticks = np.zeros(n, dtype=np.int64)  # Ticks seen; the ring head is ticks % window
+        self.ema = np.full(n, np.nan)
+        self.atr = np.full(n, np.nan)
+        self.values = np.full((n, len(self.columns)), np.nan)
+
+    def set_universe(self, symbols: List[str], index: Optional[Dict[str, int]] = None):
+        """Adopt a new symbol list, keeping the buffers of symbols that remain"""
+        if symbols is self.universe or symbols == self.universe:
+            return
+        index = index if index is not None else {s: i for i, s in enumerate(symbols)}
+        with self._lock:
+            old = (self.prices, self.ticks, self.ema, self.atr, self.values)
+            kept = [(i, index[s]) for i, s in enumerate(self.universe) if s in index]
+            self._allocate(len(symbols))
+            if kept:
+                src, dst = (np.array(p, dtype=np.intp) for p in zip(*kept))
+                for new, previous in zip((self.prices, self.ticks, self.ema, self.atr, self.values), old):
+                    new[dst] = previous[src]
+            self.universe = symbols
+            self.index = index
+
+    def positions(self, symbols: Iterable[str]) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index.get(s, -1) for s in symbols), dtype=np.intp)
+
+    def update(self, positions: np.ndarray, quotes: np.ndarray):
+        """Fold one tick per position; ``quotes`` rows are in PRICE_COLUMNS order"""
+        positions = np.asarray(positions, dtype=np.intp)
+        quotes = np.asarray(quotes, dtype=np.float64)
+        usable = (positions >= 0) & ~np.isnan(quotes[:, _LAST])
+        positions, quotes = positions[usable], quotes[usable]
+        if not len(positions):
+            return
+        # One tick per symbol per update: keep the latest quote of any repeated symbol
+        _, last_seen = np.unique(positions[::-1], return_index=True)
+        keep = len(positions) - 1 - last_seen
+        with self._lock:
+            self._update(positions[keep], quotes[keep])
+
+    def _update(self, pos: np.ndarray, quotes: np.ndarray):
+        open_, high, low, prevclose, last = (quotes[:, c] for c in (_OPEN, _HIGH, _LOW, _PREVCLOSE, _LAST))
+        ticks = self.ticks[pos]
+        first = ticks == 0
+        prev_last = np.where(first, np.nan, self.prices[pos, (ticks - 1) % self.window])
+
+        # True range against the previous tick's LAST; just HIGH - LOW on the first tick
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_last), np.abs(low - prev_last)))
+        ema, atr = self.ema[pos], self.atr[pos]
+        ema = np.where(first | np.isnan(ema), last, ema + (last - ema) * 2 / (self.ema_span + 1))
+        atr = np.where(first | np.isnan(atr), true_range, atr + (true_range - atr) / self.atr_span)
+        self.ema[pos] = ema
+        self.atr[pos] = atr
+
+        self.prices[pos, ticks % self.window] = last
+        ticks = ticks + 1
+        self.ticks[pos] = ticks
+        returns = []
+        for lag in LAGS:
+            past = self.prices[pos, (ticks - 1 - lag) % self.window]
+            returns.append(np.where(ticks > lag, _pct(last - past, past), 0.0))  # No history, no move
+
+        self.values[pos] = np.column_stack([_pct(high - low, prevclose), _pct(open_ - prevclose, prevclose),
+                                            *returns, _pct(last - ema, ema), _pct(atr, last)])
+
+    def update_frame(self, df: pd.DataFrame):
+        if df is not None and not df.empty:
+            self.update(self.positions(df['SYMBOL']),
+                        df[PRICE_COLUMNS].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def lookup(self, symbols: Iterable[str]) -> np.ndarray:
+        """Latest indicators for ``symbols``; NaN rows for symbols never seen"""
+        positions = self.positions(symbols)
+        known = positions >= 0
+        out = np.full((len(positions), len(self.columns)), np.nan)
+        with self._lock:
+            out[known] = self.values[positions[known]]
+        return out
+
+    def attach(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Copy of ``df`` with the engineered ``columns`` (default: all) added"""
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        values = self.lookup(df['SYMBOL'])
+        return df.assign(**{c: values[:, self.columns.index(c)] for c in columns})
+
+
+def replay_features(values: np.ndarray, fresh: np.ndarray, **config) -> np.ndarray:
+    """(buckets, symbols, ENGINEERED_COLUMNS) indicators for a replayed panel.
+
+    ``values`` holds the carried-forward quotes of every bucket and ``fresh``
+    marks the cells where a new quote arrived; only those count as ticks,
+    as in the live service.
+    """
+    n_buckets, n_symbols, _ = values.shape
+    engine = RollingFeatures(**(config or DEFAULT_CONFIG))
+    engine._allocate(n_symbols)
+    out = np.empty((n_buckets, n_symbols, len(engine.columns)))
+    for t in range(n_buckets):
+        positions = np.flatnonzero(fresh[t])
+        if len(positions):
+            engine.update(positions, values[t, positions])
+        out[t] = engine.values
+    return out
@@ -1,45 +1,41 @@
 from nsepython import nse_quote
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+from async_fetcher import MAX_IN_FLIGHT, RETRIES, fetch_quotes
+from quote_parser import quote_to_row
+from mmap_snapshot import write_snapshot
+from atomic_io import atomic_write_csv
+from rate_control import backoff_delay
+from symbol_universe import SymbolUniverse
 
-MAX_THREADS = 30  # Adjust between 20-50 based on your testing
-RETRIES = 2       # Retry failed requests this many times
+_universe = SymbolUniverse("symbols.csv")
 
 def fetch_all_nse_symbols():
-    df = pd.read_csv("symbols.csv")
-    return list(df['SYMBOL'])
+    return list(_universe.as_list())  # Cached; re-read only when symbols.csv changes
 
 def fetch_symbol_data(sym):
     for attempt in range(RETRIES):
         try:
             quote = nse_quote(sym)
-            return {
-                'SYMBOL': sym,
-                'OPEN': quote.get('priceInfo', {}).get('open'),
-                'HIGH': quote.get('priceInfo', {}).get('intraDayHighLow', {}).get('max'),
-                'LOW': quote.get('priceInfo', {}).get('intraDayHighLow', {}).get('min'),
-                'PREVCLOSE': quote.get('priceInfo', {}).get('previousClose'),
-                'LAST': quote.get('priceInfo', {}).get('lastPrice')
-            }
+            return quote_to_row(sym, quote)
         except Exception as e:
             print(f"⚠️ Attempt {attempt + 1} failed for {sym}: {e}")
-            time.sleep(0.2)  # Small delay before retry
+            time.sleep(backoff_delay(attempt))  # Jittered exponential delay before retry
     return None
 
-def fetch_nse_live_data(symbols, max_threads=MAX_THREADS):
-    data = []
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        futures = {executor.submit(fetch_symbol_data, sym): sym for sym in symbols}
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                data.append(result)
+def fetch_nse_live_data(symbols, max_in_flight=MAX_IN_FLIGHT, output_path="nse_live.csv",
+                        snapshot_path="nse_live.snap", **fetcher_options):
+    # All requests share one pooled keep-alive session; max_in_flight caps concurrency
+    buffer = fetch_quotes(symbols, max_in_flight=max_in_flight, **fetcher_options)
 
-    df = pd.DataFrame(data)
-    df.to_csv("nse_live.csv", index=False)
-    print(f"✅ Fetched and saved live data for {len(data)} stocks to nse_live.csv")
+    df = buffer.to_frame()
+    if output_path:
+        atomic_write_csv(df, output_path)
+        print(f"✅ Fetched and saved live data for {len(df)} stocks to {output_path}")
+    if snapshot_path:
+        # Binary snapshot that other processes can mmap without parsing
+        write_snapshot(snapshot_path, df)
+    return df
 
 if __name__ == '__main__':
     symbols = fetch_all_nse_symbols()
-    fetch_nse_live_data(symbols)  # Fetch 50 at once (increase as per stability)
+    fetch_nse_live_data(symbols)  # Full universe in one sweep
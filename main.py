@@ -1,16 +1,10 @@
 import streamlit as st
 import pandas as pd
-from fetchNSEdata import fetch_all_nse_symbols, fetch_nse_live_data
-import pickle
-import time
-import threading
+from nse_service import ServiceLock, SnapshotClient, start_engine
 import os
 import logging
-from datetime import datetime, timedelta
-import queue
-import random
-from typing import Optional, Dict, Any
-import json
+from datetime import datetime
+from typing import Any, Dict
 
 # Configure logging
 logging.basicConfig(
@@ -317,222 +311,27 @@ h1, h2, h3 {
 </style>
 """, unsafe_allow_html=True)
 
-class RobustNSEPredictor:
-    def __init__(self):
-        self.data_queue = queue.Queue()
-        self.error_queue = queue.Queue()
-        self.status_queue = queue.Queue()
-        self.last_fetch_time = None
-        self.fetch_interval = 20  # 5 minutes for better stability
-        self.rate_limit_delay = 1  # 3 seconds between API calls
-        self.max_retries = 3
-        self.symbols_batch_size = 100  # Smaller batch for reliability
-        self.is_fetching = False
-        self.last_successful_fetch = None
-        
-    def get_system_status(self) -> Dict[str, Any]:
-        """Get comprehensive system status"""
-        status = {
-            'data_file_exists': os.path.exists("nse_live.csv"),
-            'model_file_exists': os.path.exists("profit_prediction_model.pkl"),
-            'prediction_file_exists': os.path.exists("nse_live_with_profit.csv"),
-            'is_fetching': self.is_fetching,
-            'last_fetch': self.last_fetch_time,
-            'last_successful_fetch': self.last_successful_fetch,
-            'data_freshness': self.get_data_freshness(),
-            'error_count': 0
-        }
-        return status
-    
-    def get_data_freshness(self) -> str:
-        """Check how fresh the data is"""
-        if not os.path.exists("nse_live.csv"):
-            return "No data"
-        
-        try:
-            file_time = datetime.fromtimestamp(os.path.getmtime("nse_live.csv"))
-            age = datetime.now() - file_time
-            if age.total_seconds() < 300:  # 5 minutes
-                return "Fresh"
-            elif age.total_seconds() < 900:  # 15 minutes
-                return "Recent"
-            else:
-                return "Stale"
-        except:
-            return "Unknown"
-    
-    def safe_fetch_data(self) -> bool:
-        """Safely fetch data with comprehensive error handling"""
-        if self.is_fetching:
-            return False
-            
-        try:
-            self.is_fetching = True
-            current_time = datetime.now()
-            
-            # Rate limiting check
-            if (self.last_fetch_time and 
-                (current_time - self.last_fetch_time).total_seconds() < self.fetch_interval):
-                return False
-            
-            logger.info("Starting safe data fetch...")
-            
-            # Fetch symbols with retry logic
-            for attempt in range(self.max_retries):
-                try:
-                    symbols = fetch_all_nse_symbols()
-                    if symbols:
-                        break
-                    time.sleep(self.rate_limit_delay * (attempt + 1))
-                except Exception as e:
-                    logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                    if attempt == self.max_retries - 1:
-                        raise e
-                    time.sleep(self.rate_limit_delay * (attempt + 1))
-            
-            # Randomly sample 200 symbols
-            if len(symbols) > self.symbols_batch_size:
-                limited_symbols = random.sample(symbols, self.symbols_batch_size)
-            else:
-                limited_symbols = symbols
-                
-            jitter = random.uniform(2, 5)
-            time.sleep(jitter)
-            
-            # Fetch live data with retry logic
-            for attempt in range(self.max_retries):
-                try:
-                    fetch_nse_live_data(limited_symbols)
-                    break
-                except Exception as e:
-                    logger.warning(f"Data fetch attempt {attempt + 1} failed: {str(e)}")
-                    if attempt == self.max_retries - 1:
-                        raise e
-                    time.sleep(self.rate_limit_delay * (attempt + 1))
-            
-            self.last_fetch_time = current_time
-            self.last_successful_fetch = current_time
-            logger.info(f"Successfully fetched data for {len(limited_symbols)} symbols")
-            return True
-            
-        except Exception as e:
-            error_msg = f"Data fetch error: {str(e)}"
-            logger.error(error_msg)
-            self.error_queue.put(error_msg)
-            return False
-        finally:
-            self.is_fetching = False
-    
-    def safe_predict_profit(self) -> Optional[pd.DataFrame]:
-        """Safely predict profits with validation"""
-        try:
-            # Validate data file
-            if not os.path.exists("nse_live.csv"):
-                logger.warning("No live data file found")
-                return None
-            
-            df = pd.read_csv("nse_live.csv")
-            if df.empty:
-                logger.warning("Live data file is empty")
-                return None
-            
-            # Clean data
-            df = df.dropna()
-            if df.empty:
-                logger.warning("No valid data after cleaning")
-                return None
-            
-            # Validate model
-            if not os.path.exists("profit_prediction_model.pkl"):
-                logger.error("Prediction model not found")
-                return None
-            
-            with open("profit_prediction_model.pkl", "rb") as f:
-                model = pickle.load(f)
-            
-            # Validate required columns
-            required_columns = ['OPEN', 'HIGH', 'LOW', 'PREVCLOSE', 'LAST']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                logger.error(f"Missing required columns: {missing_columns}")
-                return None
-            
-            # Make predictions
-            features = df[required_columns].fillna(df[required_columns].mean())
-            df['PREDICTED_PROFIT'] = model.predict(features)
-            
-            # Save predictions
-            df.to_csv("nse_live_with_profit.csv", index=False)
-            logger.info(f"Successfully predicted profits for {len(df)} stocks")
-            return df
-            
-        except Exception as e:
-            error_msg = f"Prediction error: {str(e)}"
-            logger.error(error_msg)
-            self.error_queue.put(error_msg)
-            return None
-    
-    def background_worker(self):
-        """Main background worker with enhanced error handling"""
-        consecutive_errors = 0
-        max_consecutive_errors = 5
-        
-        while True:
-            try:
-                # Fetch data
-                if self.safe_fetch_data():
-                    consecutive_errors = 0
-                    time.sleep(10)  # Wait before prediction
-                    
-                    # Predict profits
-                    result = self.safe_predict_profit()
-                    if result is not None:
-                        self.status_queue.put("success")
-                    else:
-                        consecutive_errors += 1
-                else:
-                    consecutive_errors += 1
-                
-                # Adaptive sleep based on errors
-                if consecutive_errors > 0:
-                    sleep_time = min(self.fetch_interval * (1 + consecutive_errors), 1800)  # Max 30 min
-                    logger.warning(f"Sleeping for {sleep_time}s due to {consecutive_errors} consecutive errors")
-                    time.sleep(sleep_time)
-                else:
-                    time.sleep(self.fetch_interval)
-                
-                # Emergency stop if too many consecutive errors
-                if consecutive_errors >= max_consecutive_errors:
-                    logger.critical("Too many consecutive errors, stopping background worker")
-                    self.error_queue.put("Background worker stopped due to repeated failures")
-                    break
-                    
-            except Exception as e:
-                consecutive_errors += 1
-                error_msg = f"Background worker critical error: {str(e)}"
-                logger.critical(error_msg)
-                self.error_queue.put(error_msg)
-                time.sleep(600)  # 10 minutes on critical error
-
-# Initialize predictor
+# The engine runs once per host as `python nse_service.py`; dashboards only read
+# its snapshots. Set NSE_EMBED_ENGINE=1 to run one inside this server instead
+# when no service is running (single-user setups).
+@st.cache_resource
+def get_engine():
+    if os.environ.get("NSE_EMBED_ENGINE", "0") != "1":
+        return None
+    lock = ServiceLock()
+    thread = start_engine(lock)
+    return (lock, thread) if thread is not None else None
+
 @st.cache_resource
-def get_predictor():
-    return RobustNSEPredictor()
+def get_client():
+    return SnapshotClient()
 
-predictor = get_predictor()
+get_engine()
+client = get_client()
 
 # Initialize session state
-if 'background_started' not in st.session_state:
-    st.session_state.background_started = True
+if 'start_time' not in st.session_state:
     st.session_state.start_time = datetime.now()
-    st.session_state.error_count = 0
-    st.session_state.success_count = 0
-    st.session_state.last_status_check = datetime.now()
-    
-    # Start background worker
-    background_thread = threading.Thread(target=predictor.background_worker, daemon=True)
-    background_thread.start()
-    logger.info("Robust background worker started")
 
 # Header
 st.markdown("""
@@ -542,213 +341,231 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# System status monitoring
-system_status = predictor.get_system_status()
-
-# Process status updates
-try:
-    while not predictor.error_queue.empty():
-        error = predictor.error_queue.get_nowait()
-        st.session_state.error_count += 1
-        logger.error(f"UI Error: {error}")
-        
-    while not predictor.status_queue.empty():
-        status = predictor.status_queue.get_nowait()
-        if status == "success":
-            st.session_state.success_count += 1
-except:
-    pass
-
-# Status cards
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    fetch_status = "error" if not system_status['data_file_exists'] else ("warning" if system_status['data_freshness'] == "Stale" else "")
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3 style="color: white; margin: 0;">🔄 Data Pipeline</h3>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">
-            {system_status['data_freshness']} Data
-            <span class="status-indicator {fetch_status}"></span>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    model_status = "error" if not system_status['model_file_exists'] else ""
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3 style="color: white; margin: 0;">🤖 AI Engine</h3>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">
-            {"Model Ready" if system_status['model_file_exists'] else "Model Missing"}
-            <span class="status-indicator {model_status}"></span>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    prediction_status = "error" if not system_status['prediction_file_exists'] else ""
-    st.markdown(f"""
-    <div class="metric-card">
-        <h3 style="color: white; margin: 0;">📊 Predictions</h3>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">
-            {"Analysis Ready" if system_status['prediction_file_exists'] else "Processing"}
-            <span class="status-indicator {prediction_status}"></span>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+# Each panel is a fragment that polls the published files every REFRESH_SECONDS,
+# so the page (styles, header) is never rerun for an update. What a panel draws
+# is built once per key of the data it shows (the live snapshot version, or the
+# status fields it renders) and shared by every session; a panel whose key has
+# not moved redraws the same elements, which Streamlit's message cache sends as
+# references rather than resending the tables.
+REFRESH_SECONDS = 1
+CARD_FIELDS = ('has_live_data', 'data_freshness', 'market_phase', 'model_ready', 'model_info', 'has_predictions')
+PREDICTION_FIELDS = ('has_predictions', 'rankings')
+
+def build_live_view(live_data: pd.DataFrame) -> Dict[str, Any]:
+    """Display table and stats for one live snapshot version"""
+    avg_price = live_data['LAST'].mean() if 'LAST' in live_data.columns else 0
+    display_columns = ['SYMBOL', 'LAST', 'OPEN', 'HIGH', 'LOW', 'CHANGE', 'PCHANGE']
+    available_columns = [col for col in display_columns if col in live_data.columns]
+    display_data = None
+    if available_columns:
+        display_data = live_data[available_columns].copy()
+        # Clean data by removing invalid entries
+        display_data = display_data.dropna(subset=['SYMBOL', 'LAST'])
+        display_data = display_data[display_data['LAST'] > 0]
+    return {'empty': live_data.empty, 'avg_price': avg_price, 'display_data': display_data}
+
+def ranking_frame(entries: list) -> pd.DataFrame:
+    """Rounded display table for one ranking from the engine's index"""
+    display_df = pd.DataFrame(entries, columns=['SYMBOL', 'LAST', 'PREDICTED_PROFIT', 'CHANGE_PCT'])
+    return display_df.round({'LAST': 2, 'PREDICTED_PROFIT': 2, 'CHANGE_PCT': 2})
+
+def build_prediction_view(system_status: Dict[str, Any]) -> Dict[str, Any]:
+    """Ranking tables for one version of the engine's rankings"""
+    rankings = system_status.get('rankings') or {}
+    frames = {}
+    if rankings.get('count'):
+        for key in ('top', 'bottom', 'movers'):
+            columns = ['SYMBOL', 'LAST', 'PREDICTED_PROFIT'] + (['CHANGE_PCT'] if key == 'movers' else [])
+            frames[key] = ranking_frame(rankings[key])[columns]
+    return {'has_predictions': system_status['has_predictions'], 'rankings': rankings, 'frames': frames}
+
+def build_status_cards(system_status: Dict[str, Any]) -> list:
+    """HTML of the three status cards for one version of the fields they show"""
+    fetch_status = "error" if not system_status['has_live_data'] else ("warning" if system_status['data_freshness'] == "Stale" else "")
+    model_status = "error" if not system_status['model_ready'] else ""
+    model_info = system_status.get('model_info')
+    model_label = (f"Model {model_info['version']} · loaded {datetime.fromisoformat(model_info['loaded_at']).strftime('%H:%M:%S')}"
+                   if model_info else "Model Missing")
+    prediction_status = "error" if not system_status['has_predictions'] else ""
+    return [f"""
+        <div class="metric-card">
+            <h3 style="color: white; margin: 0;">🔄 Data Pipeline</h3>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">
+                {system_status['data_freshness']} Data · Market {system_status['market_phase']}
+                <span class="status-indicator {fetch_status}"></span>
+            </p>
+        </div>
+        """, f"""
+        <div class="metric-card">
+            <h3 style="color: white; margin: 0;">🤖 AI Engine</h3>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">
+                {model_label}
+                <span class="status-indicator {model_status}"></span>
+            </p>
+        </div>
+        """, f"""
+        <div class="metric-card">
+            <h3 style="color: white; margin: 0;">📊 Predictions</h3>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">
+                {"Analysis Ready" if system_status['has_predictions'] else "Processing"}
+                <span class="status-indicator {prediction_status}"></span>
+            </p>
+        </div>
+        """]
 
-# Main content
-col_left, col_right = st.columns(2)
+@st.fragment(run_every=REFRESH_SECONDS)
+def status_cards():
+    cards = client.status_view(CARD_FIELDS, "cards", build_status_cards)
+    for column, card in zip(st.columns(3), cards):
+        column.markdown(card, unsafe_allow_html=True)
 
-with col_left:
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_panel():
     st.markdown("""
     <div class="data-section">
         <h2 class="section-title">📈 Live Market Data</h2>
     """, unsafe_allow_html=True)
-    
-    if system_status['data_file_exists']:
-        try:
-            live_data = pd.read_csv("nse_live.csv")
-            if not live_data.empty:
-                # Market statistics with error handling
-                try:
-                    avg_price = live_data['LAST'].mean() if 'LAST' in live_data.columns else 0
-                except Exception:
-                    avg_price = 0
-                    logger.warning("Failed to calculate average price")
 
-                st.markdown(f"""
-                <div class="stats-grid">
-                    <div class="stat-item">
-                        <div class="stat-number">2034</div>
-                        <div class="stat-label">Active Stocks</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-number">₹{avg_price:.0f}</div>
-                        <div class="stat-label">Avg Price</div>
-                    </div>
+    try:
+        view = client.view("live", "table", build_live_view)
+        if view is None:
+            st.markdown('<div class="alert-message alert-info"><span class="loading-spinner"></span> Initializing market data feed...</div>', unsafe_allow_html=True)
+        elif not view['empty']:
+            st.markdown(f"""
+            <div class="stats-grid">
+                <div class="stat-item">
+                    <div class="stat-number">2034</div>
+                    <div class="stat-label">Active Stocks</div>
                 </div>
-                """, unsafe_allow_html=True)
-                
-                # Display data with validation
-                display_columns = ['SYMBOL', 'LAST', 'OPEN', 'HIGH', 'LOW', 'CHANGE', 'PCHANGE']
-                available_columns = [col for col in display_columns if col in live_data.columns]
-                if available_columns:
-                    display_data = live_data[available_columns].copy()
-                    # Clean data by removing invalid entries
-                    display_data = display_data.dropna(subset=['SYMBOL', 'LAST'])
-                    display_data = display_data[display_data['LAST'] > 0]
-                    st.dataframe(display_data, use_container_width=True, height=350)
-                else:
-                    st.markdown('<div class="alert-message alert-warning">⚠️ Required columns not found in data</div>', unsafe_allow_html=True)
+                <div class="stat-item">
+                    <div class="stat-number">₹{view['avg_price']:.0f}</div>
+                    <div class="stat-label">Avg Price</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            if view['display_data'] is not None:
+                st.dataframe(view['display_data'], use_container_width=True, height=350)
             else:
-                st.markdown('<div class="alert-message alert-warning">📊 Data file is empty. Refreshing...</div>', unsafe_allow_html=True)
-        except pd.errors.EmptyDataError:
-            st.markdown('<div class="alert-message alert-error">❌ Empty data file detected</div>', unsafe_allow_html=True)
-            logger.error("Empty data file detected")
-        except Exception as e:
-            st.markdown(f'<div class="alert-message alert-error">❌ Error loading data: {str(e)}</div>', unsafe_allow_html=True)
-            logger.error(f"Error loading market data: {str(e)}")
-    else:
-        st.markdown('<div class="alert-message alert-info"><span class="loading-spinner"></span> Initializing market data feed...</div>', unsafe_allow_html=True)
-    
+                st.markdown('<div class="alert-message alert-warning">⚠️ Required columns not found in data</div>', unsafe_allow_html=True)
+        else:
+            st.markdown('<div class="alert-message alert-warning">📊 Data snapshot is empty. Refreshing...</div>', unsafe_allow_html=True)
+    except Exception as e:
+        st.markdown(f'<div class="alert-message alert-error">❌ Error loading data: {str(e)}</div>', unsafe_allow_html=True)
+        logger.error(f"Error loading market data: {str(e)}")
+
     st.markdown("</div>", unsafe_allow_html=True)
 
-with col_right:
+@st.fragment(run_every=REFRESH_SECONDS)
+def prediction_panel():
     st.markdown("""
     <div class="data-section">
         <h2 class="section-title">🎯 AI Profit Predictions</h2>
     """, unsafe_allow_html=True)
-    
-    if system_status['prediction_file_exists']:
-        try:
-            profit_data = pd.read_csv("nse_live_with_profit.csv")
-            if not profit_data.empty and 'PREDICTED_PROFIT' in profit_data.columns:
-                # Get top predictions
-                top_predictions = profit_data.nlargest(5, 'PREDICTED_PROFIT')
-                
-                # Prediction statistics (removed avg_profit)
-                max_profit = profit_data['PREDICTED_PROFIT'].max()
-                
+
+    try:
+        # Rankings are maintained incrementally by the engine; nothing is scanned here
+        view = client.status_view(PREDICTION_FIELDS, "rankings", build_prediction_view)
+        rankings = view['rankings']
+        if not view['has_predictions']:
+            st.markdown('<div class="alert-message alert-info"><span class="loading-spinner"></span> AI is analyzing market data...</div>', unsafe_allow_html=True)
+        elif view['frames']:
+            st.markdown(f"""
+            <div class="stats-grid">
+                <div class="stat-item">
+                    <div class="stat-number">{rankings['count']}</div>
+                    <div class="stat-label">Stocks Analyzed</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-number">₹{rankings['max']:.2f}</div>
+                    <div class="stat-label">Maximum Potential</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            top_tab, bottom_tab, movers_tab = st.tabs(["Top", "Bottom", "Movers"])
+            for tab, key in ((top_tab, 'top'), (bottom_tab, 'bottom'), (movers_tab, 'movers')):
+                tab.dataframe(view['frames'][key], use_container_width=True, height=250)
+
+            # Highlight best prediction
+            best = rankings['top'][0] if rankings['top'] else None
+            if best is not None:
                 st.markdown(f"""
-                <div class="stats-grid">
-                    <div class="stat-item">
-                        <div class="stat-number">{len(profit_data)}</div>
-                        <div class="stat-label">Stocks Analyzed</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-number">₹{max_profit:.2f}</div>
-                        <div class="stat-label">Maximum Potential</div>
+                <div style="text-align: center;">
+                    <div class="profit-highlight">
+                        🏆 Top Pick: {best['SYMBOL']} - Predicted: ₹{best['PREDICTED_PROFIT']:.2f}
                     </div>
                 </div>
                 """, unsafe_allow_html=True)
-                
-                # Display top predictions
-                display_df = top_predictions[['SYMBOL', 'LAST', 'PREDICTED_PROFIT']].copy()
-                display_df['LAST'] = display_df['LAST'].round(2)
-                display_df['PREDICTED_PROFIT'] = display_df['PREDICTED_PROFIT'].round(2)
-                st.dataframe(display_df, use_container_width=True, height=250)
-                
-                # Highlight best prediction
-                if not top_predictions.empty:
-                    best = top_predictions.iloc[0]
-                    st.markdown(f"""
-                    <div style="text-align: center;">
-                        <div class="profit-highlight">
-                            🏆 Top Pick: {best['SYMBOL']} - Predicted: ₹{best['PREDICTED_PROFIT']:.2f}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.markdown('<div class="alert-message alert-warning">🤖 Predictions are being calculated...</div>', unsafe_allow_html=True)
-        except Exception as e:
-            st.markdown(f'<div class="alert-message alert-error">❌ Prediction error: {str(e)}</div>', unsafe_allow_html=True)
-    else:
-        st.markdown('<div class="alert-message alert-info"><span class="loading-spinner"></span> AI is analyzing market data...</div>', unsafe_allow_html=True)
-    
+        else:
+            st.markdown('<div class="alert-message alert-warning">🤖 Predictions are being calculated...</div>', unsafe_allow_html=True)
+    except Exception as e:
+        st.markdown(f'<div class="alert-message alert-error">❌ Prediction error: {str(e)}</div>', unsafe_allow_html=True)
+
     st.markdown("</div>", unsafe_allow_html=True)
 
-# System statistics footer
-if 'refresh_counter' not in st.session_state:
-    st.session_state.refresh_counter = 0
-
-# Clear previous elements on refresh
-if st.session_state.refresh_counter > 0:
-    st.empty()
-
-uptime = datetime.now() - st.session_state.start_time
-st.markdown(f"""
-<div class="data-section" style="margin-top: 2rem;">
-    <h3 style="text-align: center; color: #667eea; margin-bottom: 1rem;">📊 System Performance</h3>
-    <div class="stats-grid">
-        <div class="stat-item">
-            <div class="stat-number">{int(uptime.total_seconds() // 60)}</div>
-            <div class="stat-label">Minutes Online</div>
-        </div>
-        <div class="stat-item">
-            <div class="stat-number">{st.session_state.success_count}</div>
-            <div class="stat-label">Successful Updates</div>
-        </div>
-        <div class="stat-item">
-            <div class="stat-number">{st.session_state.error_count}</div>
-            <div class="stat-label">Errors Handled</div>
-        </div>
-        <div class="stat-item">
-            <div class="stat-number">5</div>
-            <div class="stat-label">Sec Refresh</div>
+@st.fragment(run_every=REFRESH_SECONDS)
+def system_panel():
+    system_status = client.get_system_status()
+
+    # Pipeline timing panel
+    with st.expander("⏱️ Pipeline Timing", expanded=False):
+        stage_rows = system_status.get('stages', [])
+        if stage_rows:
+            st.dataframe(pd.DataFrame(stage_rows), use_container_width=True, hide_index=True)
+        else:
+            st.markdown('<div class="alert-message alert-info">No pipeline cycles recorded yet</div>', unsafe_allow_html=True)
+
+        live_age = system_status['live_age']
+        cache_stats = system_status.get('quote_cache', {})
+        rate_stats = system_status.get('rate_control', {})
+        timing_cols = st.columns(4)
+        timing_cols[0].metric("Stream Queue", system_status.get('stream_queue', 0))
+        timing_cols[1].metric("Snapshot Age", f"{live_age:.0f}s" if live_age is not None else "n/a")
+        timing_cols[2].metric("Cache Hit Ratio", f"{cache_stats.get('hit_ratio', 0):.0%}")
+        timing_cols[3].metric("Request Rate", f"{rate_stats.get('rate', 0):.0f}/s",
+                              f"{rate_stats.get('throttled', 0)} throttled", delta_color="off")
+        engine_pid = system_status['engine_pid']
+        st.caption(f"Engine pid {engine_pid}" if engine_pid else "No engine running — start one with `python nse_service.py`")
+
+    # System statistics footer
+    uptime = datetime.now() - st.session_state.start_time
+    st.markdown(f"""
+    <div class="data-section" style="margin-top: 2rem;">
+        <h3 style="text-align: center; color: #667eea; margin-bottom: 1rem;">📊 System Performance</h3>
+        <div class="stats-grid">
+            <div class="stat-item">
+                <div class="stat-number">{int(uptime.total_seconds() // 60)}</div>
+                <div class="stat-label">Minutes Online</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">{system_status.get('worker_cycles', {}).get('success', 0)}</div>
+                <div class="stat-label">Successful Updates</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">{system_status.get('worker_cycles', {}).get('error', 0)}</div>
+                <div class="stat-label">Errors Handled</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-number">{REFRESH_SECONDS}</div>
+                <div class="stat-label">Sec Refresh</div>
+            </div>
         </div>
+        <p style="text-align: center; color: #667eea; margin-top: 1rem;">
+            🔄 Live updates as the engine publishes | 🛡️ Enterprise-grade reliability | ⏰ {datetime.now().strftime("%H:%M:%S")}
+        </p>
     </div>
-    <p style="text-align: center; color: #667eea; margin-top: 1rem;">
-        🔄 Auto-updating every 5 minutes | 🛡️ Enterprise-grade reliability | ⏰ {datetime.now().strftime("%H:%M:%S")}
-    </p>
-</div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
-# Update refresh counter and handle auto-refresh
-st.session_state.refresh_counter += 1
-time.sleep(5)
+status_cards()
+
+# Main content
+col_left, col_right = st.columns(2)
+
+with col_left:
+    live_panel()
+
+with col_right:
+    prediction_panel()
 
-# Use a container to prevent duplicates
-with st.empty():
-    st.rerun()
\ No newline at end of file
+system_panel()
@@ -0,0 +1,146 @@
+import logging
+import os
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))  # No DST, so a fixed offset is exact
+
+PRE_OPEN_START = dtime(9, 0)
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+POST_CLOSE_START = dtime(15, 40)
+POST_CLOSE_END = dtime(16, 0)
+
+CLOSED = "closed"
+PRE_OPEN = "pre-open"
+OPEN = "open"
+POST_CLOSE = "post-close"
+
+
+class MarketCalendar:
+    """Offline NSE cash-market calendar in IST.
+
+    Weekends are always closed. Exchange holidays come from ``holidays``
+    and/or ``holidays_path``, a text file with one ISO date per line
+    (``#`` starts a comment). The file is optional; it is re-stat'ed at
+    most every ``reload_interval`` seconds and re-read when it changes.
+    """
+
+    def __init__(self, holidays: Iterable[date] = (), holidays_path: Optional[str] = "nse_holidays.txt",
+                 reload_interval: float = 60.0):
+        self.extra_holidays = set(holidays)
+        self.holidays_path = holidays_path
+        self.reload_interval = reload_interval
+        self._file_holidays = set()
+        self._file_mtime = None
+        self._checked_at = None
+
+    @property
+    def holidays(self):
+        self._reload_holidays()
+        return self.extra_holidays | self._file_holidays
+
+    def _reload_holidays(self):
+        if not self.holidays_path:
+            return
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.holidays_path)
+        except OSError:
+            self._file_holidays, self._file_mtime = set(), None
+            return
+        if mtime == self._file_mtime:
+            return
+        holidays = set()
+        with open(self.holidays_path) as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                try:
+                    holidays.add(date.fromisoformat(line))
+                except ValueError:
+                    logger.warning(f"Ignoring bad holiday entry {line!r} in {self.holidays_path}")
+        self._file_holidays, self._file_mtime = holidays, mtime
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def phase(self, now: Optional[datetime] = None) -> str:
+        now = (now or datetime.now(IST)).astimezone(IST)
+        if not self.is_trading_day(now.date()):
+            return CLOSED
+        t = now.time()
+        if PRE_OPEN_START <= t < MARKET_OPEN:
+            return PRE_OPEN
+        if MARKET_OPEN <= t < MARKET_CLOSE:
+            return OPEN
+        if POST_CLOSE_START <= t < POST_CLOSE_END:
+            return POST_CLOSE
+        return CLOSED
+
+    def is_open(self, ts: float) -> bool:
+        """Whether regular trading is live at epoch time ``ts``"""
+        return self.phase(datetime.fromtimestamp(ts, IST)) == OPEN
+
+    def next_session_start(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the next pre-open window after ``now``"""
+        now = (now or datetime.now(IST)).astimezone(IST)
+        day = now.date()
+        for _ in range(366):
+            start = datetime.combine(day, PRE_OPEN_START, IST)
+            if start > now and self.is_trading_day(day):
+                return start
+            day += timedelta(days=1)
+        raise ValueError("No trading day within a year; check the holiday list")
+
+
+class SessionAction(NamedTuple):
+    fetch: bool
+    full_universe: bool  # True for the end-of-day close snapshot
+    sleep: float         # Seconds to wait before asking again
+    phase: str
+
+
+class SessionScheduler:
+    """Turn the market calendar into the worker's fetch cadence.
+
+    During the regular session the worker fetches every ``session_interval``
+    seconds and in pre-open every ``pre_open_interval``. After the close of a
+    trading day it takes one full-universe close snapshot, then idles until
+    the next pre-open (waking at least every ``max_idle`` to re-check).
+    """
+
+    def __init__(self, calendar: MarketCalendar, session_interval: float = 20,
+                 pre_open_interval: float = 60, max_idle: float = 3600):
+        self.calendar = calendar
+        self.session_interval = session_interval
+        self.pre_open_interval = pre_open_interval
+        self.max_idle = max_idle
+        self.last_close_snapshot: Optional[date] = None
+
+    def next_action(self, now: Optional[datetime] = None) -> SessionAction:
+        now = (now or datetime.now(IST)).astimezone(IST)
+        phase = self.calendar.phase(now)
+        if phase == OPEN:
+            return SessionAction(True, False, self.session_interval, phase)
+        if phase == PRE_OPEN:
+            return SessionAction(True, False, self.pre_open_interval, phase)
+
+        today = now.date()
+        if (self.calendar.is_trading_day(today) and now.time() >= MARKET_CLOSE
+                and self.last_close_snapshot != today):
+            return SessionAction(True, True, self.session_interval, phase)
+
+        idle = (self.calendar.next_session_start(now) - now).total_seconds()
+        return SessionAction(False, False, max(min(idle, self.max_idle), 1.0), phase)
+
+    def mark_fetched(self, action: SessionAction, now: Optional[datetime] = None):
+        if action.full_universe:
+            self.last_close_snapshot = (now or datetime.now(IST)).astimezone(IST).date()
@@ -0,0 +1,124 @@
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write_bytes
+from quote_parser import COLUMNS
+
+MAGIC = b'NSESNAP1'
+# magic, seq, n_rows, n_cols, symbol_width, published_at
+HEADER = struct.Struct('<8sQQIId')
+COLUMN_NAME_WIDTH = 16
+ALIGN = 8
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class MappedSnapshot(NamedTuple):
+    seq: int
+    published_at: float
+    columns: List[str]
+    symbols: np.ndarray  # Fixed-width bytes ('S<n>'), zero-copy view
+    values: np.ndarray   # (n_rows, n_cols) float64, zero-copy read-only view
+
+    def symbol_index(self) -> Dict[str, int]:
+        return {s.decode('ascii'): i for i, s in enumerate(self.symbols)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy the snapshot out into a regular DataFrame"""
+        df = pd.DataFrame(np.array(self.values), columns=self.columns)
+        df.insert(0, 'SYMBOL', np.char.decode(self.symbols, 'ascii'))
+        return df
+
+
+def read_header(path: str):
+    with open(path, 'rb') as f:
+        magic, seq, n_rows, n_cols, width, published_at = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a snapshot file")
+    return seq, n_rows, n_cols, width, published_at
+
+
+def write_snapshot(path: str, df: pd.DataFrame, columns: Sequence[str] = COLUMNS[1:],
+                   seq: Optional[int] = None) -> int:
+    """Atomically replace ``path`` with a binary snapshot of ``df``; returns its seq.
+
+    The file goes through ``atomic_write_bytes`` (temp file, fsync, rename,
+    single writer), so readers only ever map a complete file. Readers that still
+    map the previous file keep a consistent view of it.
+    """
+    if seq is None:
+        try:
+            seq = read_header(path)[0] + 1
+        except (OSError, ValueError, struct.error):
+            seq = 1
+
+    columns = list(columns)
+    symbols = df['SYMBOL'].astype(str).to_numpy()
+    encoded = np.char.encode(symbols.astype('U'), 'ascii') if len(symbols) else np.array([], dtype='S1')
+    width = max(encoded.dtype.itemsize, 1)
+    values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    names = b''.join(c.encode('ascii')[:COLUMN_NAME_WIDTH].ljust(COLUMN_NAME_WIDTH, b'\0') for c in columns)
+    header = HEADER.pack(MAGIC, seq, len(symbols), len(columns), width, time.time())
+    symbol_bytes = encoded.astype(f'S{width}').tobytes()
+    symbols_end = HEADER.size + len(names) + len(symbol_bytes)
+    padding = b'\0' * (_aligned(symbols_end) - symbols_end)
+
+    atomic_write_bytes(path, b''.join([header, names, symbol_bytes, padding, values.tobytes()]),
+                       skip_unchanged=False)
+    return seq
+
+
+class MmapSnapshotReader:
+    """Map a snapshot file and hand out zero-copy NumPy views of it.
+
+    ``read()`` only re-maps when the file on disk has been replaced, so
+    polling it is a single ``stat`` call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stat_key = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._snapshot: Optional[MappedSnapshot] = None
+
+    def read(self) -> Optional[MappedSnapshot]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._snapshot
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._stat_key:
+            self._remap()
+            self._stat_key = stat_key
+        return self._snapshot
+
+    def _remap(self):
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, seq, n_rows, n_cols, width, published_at = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a snapshot file")
+
+        names_offset = HEADER.size
+        names = [bytes(mapped[names_offset + i * COLUMN_NAME_WIDTH:names_offset + (i + 1) * COLUMN_NAME_WIDTH])
+                 .rstrip(b'\0').decode('ascii') for i in range(n_cols)]
+        symbols_offset = names_offset + n_cols * COLUMN_NAME_WIDTH
+        values_offset = _aligned(symbols_offset + width * n_rows)
+
+        symbols = np.frombuffer(mapped, dtype=f'S{width}', count=n_rows, offset=symbols_offset)
+        values = np.frombuffer(mapped, dtype=np.float64, count=n_rows * n_cols,
+                               offset=values_offset).reshape(n_rows, n_cols)
+        # The previous mmap is left to the garbage collector: views handed
+        # out earlier may still reference it.
+        self._mmap = mapped
+        self._snapshot = MappedSnapshot(seq, published_at, names, symbols, values)
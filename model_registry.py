@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from features import DEFAULT_CONFIG, SERVED_COLUMNS, needs_rolling
+from scoring import FEATURE_COLUMNS, ScoringEngine
+
+logger = logging.getLogger(__name__)
+
+# Marks a pickle written by train_model.py: {'format', 'model', 'metadata'}
+ARTIFACT_FORMAT = 'stock-master-model/1'
+
+
+class ModelInfo(NamedTuple):
+    path: str
+    version: str  # Short content hash of the pickle
+    mtime: float
+    loaded_at: datetime
+    metadata: Optional[Dict[str, Any]] = None  # None for a bare pickled estimator
+
+
+def unpack_model(obj) -> Tuple[object, Optional[Dict[str, Any]]]:
+    """(estimator, metadata) from a training artifact or a bare pickled model"""
+    if isinstance(obj, dict) and obj.get('format') == ARTIFACT_FORMAT:
+        return obj['model'], obj['metadata']
+    return obj, None
+
+
+def validate_metadata(model, metadata: Optional[Dict[str, Any]]):
+    """Raise ValueError if the artifact expects features the service does not provide"""
+    if metadata is None:
+        return
+    names = list(metadata.get('feature_names') or [])
+    if not names or len(set(names)) != len(names) or any(n not in SERVED_COLUMNS for n in names):
+        raise ValueError(f"Model expects features {names}, service provides {SERVED_COLUMNS}")
+    if needs_rolling(names) and metadata.get('feature_engine') != DEFAULT_CONFIG:
+        raise ValueError(f"Model was trained with feature engine {metadata.get('feature_engine')}, "
+                         f"service runs {DEFAULT_CONFIG}")
+    n_features = getattr(model, 'n_features_in_', len(names))
+    if n_features != len(names):
+        raise ValueError(f"Model was fitted on {n_features} features but lists {len(names)}")
+
+
+def load_model(payload: bytes) -> Tuple[object, ScoringEngine, Optional[Dict[str, Any]]]:
+    """Unpickle, validate and wrap a model file's contents"""
+    model, metadata = unpack_model(pickle.loads(payload))
+    validate_metadata(model, metadata)
+    columns = metadata['feature_names'] if metadata else FEATURE_COLUMNS
+    return model, ScoringEngine(model, columns), metadata
+
+
+class LoadedModel(NamedTuple):
+    model: object
+    engine: ScoringEngine
+    info: ModelInfo
+    payload: bytes = b''  # The validated file contents, for handing to other processes
+
+
+class ModelRegistry:
+    """Keep the pickled model resident and hot-reload it when the file changes.
+
+    ``get()`` stats the file at most once per ``check_interval`` seconds. A
+    changed file is unpickled off to the side and then swapped in with a
+    single reference assignment, so a prediction that already holds the old
+    ``LoadedModel`` finishes with it undisturbed.
+
+    Files written by train_model.py carry metadata (feature names, training
+    window, CV metrics); a file whose features do not match what the
+    service computes is rejected and the current model keeps serving.
+    """
+
+    def __init__(self, path: str = "profit_prediction_model.pkl", check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.current: Optional[LoadedModel] = None
+        self._last_check = 0.0
+        self._last_stat = None
+        self._reload_lock = threading.Lock()
+
+    def get(self) -> Optional[LoadedModel]:
+        """The model currently serving, reloading first if the file changed"""
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.maybe_reload()
+        return self.current
+
+    def info(self) -> Optional[ModelInfo]:
+        current = self.current
+        return current.info if current else None
+
+    def maybe_reload(self) -> bool:
+        """Reload the model if the file's mtime/size changed; True if swapped"""
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # Another thread is already reloading
+        try:
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self.current is None:
+                    logger.error(f"Prediction model not found: {self.path}")
+                return False
+
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            if stat_key == self._last_stat:
+                return False
+
+            with open(self.path, "rb") as f:
+                payload = f.read()
+            version = hashlib.sha256(payload).hexdigest()[:12]
+            self._last_stat = stat_key
+            if self.current is not None and self.current.info.version == version:
+                return False  # Touched but unchanged
+
+            model, engine, metadata = load_model(payload)
+            info = ModelInfo(self.path, version, stat.st_mtime, datetime.now(), metadata)
+            self.current = LoadedModel(model, engine, info, payload)
+            logger.info(f"Loaded prediction model {version} from {self.path} "
+                        f"({'closed-form' if engine.is_linear else 'predict'} scoring)")
+            return True
+        except Exception as e:
+            logger.error(f"Model reload failed, keeping current model: {str(e)}")
+            return False
+        finally:
+            self._reload_lock.release()
@@ -0,0 +1,727 @@
+"""Standalone NSE fetch/predict engine.
+
+    python nse_service.py [--prediction-workers N] [--metrics-port 9108]
+
+Exactly one engine runs per host: it holds an exclusive lock on
+``nse_service.pid`` for its lifetime. It publishes through files that
+readers map rather than parse: periodic full checkpoints in
+``nse_live.snap`` and ``nse_live_with_profit.snap`` (see mmap_snapshot.py),
+the rows that changed since the last checkpoint in ``nse_deltas.bin``
+(see delta_log.py), and a small ``nse_status.json``. Any number of
+dashboards read them with ``SnapshotClient``.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from atomic_io import atomic_write_bytes, atomic_write_csv
+from delta_log import DeltaLogReader, DeltaLogWriter, apply_records
+from features import DEFAULT_CONFIG, RollingFeatures, needs_rolling
+from fetchNSEdata import fetch_nse_live_data
+from market_calendar import MarketCalendar, SessionScheduler
+from metrics import REGISTRY, STAGE_SECONDS, WORKER_CYCLES, stage_timer, start_http_server
+from mmap_snapshot import MmapSnapshotReader, write_snapshot
+from model_registry import ModelRegistry
+from parallel_predict import ProcessPoolScorer
+from quote_parser import COLUMNS
+from quote_cache import QuoteCache
+from rate_control import AdaptiveRateController
+from refresh_scheduler import RefreshScheduler
+from snapshot_store import SnapshotStore
+from streaming import MicroBatchPredictor, PREDICTION_COLUMNS
+from symbol_universe import SymbolUniverse
+from topk_index import RankingIndex
+try:
+    from tick_history import TickHistory
+except ImportError:  # pyarrow is optional; history is simply not recorded
+    TickHistory = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+LIVE_SNAPSHOT = "nse_live.snap"
+PREDICTIONS_SNAPSHOT = "nse_live_with_profit.snap"
+DELTA_LOG = "nse_deltas.bin"
+STATUS_PATH = "nse_status.json"
+LOCK_PATH = "nse_service.pid"
+
+
+class ServiceLock:
+    """Non-blocking exclusive lock on a pid file, held for the engine's lifetime"""
+
+    def __init__(self, path: str = LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Take the lock; False if another process already holds it"""
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()  # Closing the descriptor drops the lock
+            self._file = None
+
+    def holder_pid(self) -> Optional[int]:
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+
+def data_freshness(published_at: Optional[datetime]) -> str:
+    """Fresh / Recent / Stale label for a snapshot publish time"""
+    if published_at is None:
+        return "No data"
+    age = (datetime.now() - published_at).total_seconds()
+    if age < 300:  # 5 minutes
+        return "Fresh"
+    elif age < 900:  # 15 minutes
+        return "Recent"
+    return "Stale"
+
+
+def stage_summary() -> list:
+    """Runs, average and p95 milliseconds per pipeline stage"""
+    rows = []
+    for labels in STAGE_SECONDS.label_sets():
+        count = STAGE_SECONDS.count(**labels)
+        p95 = STAGE_SECONDS.quantile(0.95, **labels)
+        rows.append({
+            'Stage': labels['stage'],
+            'Runs': count,
+            'Avg (ms)': round(STAGE_SECONDS.total(**labels) / count * 1000, 1) if count else None,
+            'p95 (ms)': round(p95 * 1000, 1) if p95 is not None else None,
+        })
+    return rows
+
+
+class RobustNSEPredictor:
+    def __init__(self, prediction_workers: int = 0, persist_csv: bool = True):
+        self.data_queue = queue.Queue()
+        self.error_queue = queue.Queue()
+        self.status_queue = queue.Queue()
+        self.last_fetch_time = None
+        self.fetch_interval = 20  # 5 minutes for better stability
+        self.rate_limit_delay = 1  # 3 seconds between API calls
+        self.rate_controller = AdaptiveRateController()  # Shared by every sweep so it keeps what it learned
+        self.calendar = MarketCalendar(holidays_path="nse_holidays.txt")
+        self.session = SessionScheduler(self.calendar, session_interval=self.fetch_interval)
+        self.quote_cache = QuoteCache(path="quote_cache.pkl", market_open=self.calendar.is_open)
+        self.quote_cache.load()
+        self.max_retries = 3
+        self.symbols_batch_size = 100  # Symbols per shard; the scheduler rotates through all of them
+        self.universe = SymbolUniverse("symbols.csv")  # Re-read only when the file changes
+        self.scheduler = RefreshScheduler(shard_size=self.symbols_batch_size)
+        self.is_fetching = False
+        self.last_successful_fetch = None
+        self.store = SnapshotStore()
+        self.models = ModelRegistry("profit_prediction_model.pkl")
+        self.rankings = RankingIndex(k=5)  # Top/bottom/movers, updated as rows are re-scored
+        self.features = RollingFeatures(**DEFAULT_CONFIG)  # Rolling indicators, fed by the stream
+        self.stream = MicroBatchPredictor(self.models, self.store, index=self.rankings, features=self.features)
+        self.prediction_workers = prediction_workers  # >0 scores full snapshots on a process pool
+        self.pool_scorer = ProcessPoolScorer(self.prediction_workers) if self.prediction_workers > 0 else None
+        self.scored_version = None  # Model that last scored the whole snapshot
+        self.persist_csv = persist_csv  # Keep writing the CSVs as a persistence sink
+        self.recent_errors = deque(maxlen=20)
+        self.deltas = DeltaLogWriter(DELTA_LOG)
+        self.checkpoint_every = 15  # Cycles between full snapshot/CSV rewrites; deltas in between
+        self.cycles_since_checkpoint = None  # None until the first checkpoint
+        self.history = TickHistory("tick_history") if TickHistory else None
+        self.last_compaction_day = None
+        self.load_persisted_snapshots()
+        self.register_metrics()
+        
+    def load_persisted_snapshots(self):
+        """Warm the snapshot store, scheduler and stream from the files left by a previous run.
+
+        Each checkpoint is brought up to date with the delta log's current
+        epoch when that epoch was written on top of it, so the changes made
+        since the last checkpoint survive a restart.
+        """
+        reader = DeltaLogReader(DELTA_LOG)
+        try:
+            _, records = reader.poll()
+        except Exception as e:
+            logger.warning(f"Could not read delta log: {str(e)}")
+            records = []
+        for name, snap_path, csv_path in (("live", LIVE_SNAPSHOT, "nse_live.csv"),
+                                          ("predictions", PREDICTIONS_SNAPSHOT, "nse_live_with_profit.csv")):
+            try:
+                if os.path.exists(snap_path):
+                    mapped = MmapSnapshotReader(snap_path).read()
+                    df = mapped.to_frame()
+                    published_at = datetime.fromtimestamp(mapped.published_at)
+                    pending = [r for r in records if r.kind == name]
+                    if pending and reader.epoch is not None and reader.epoch.get(name) == mapped.seq:
+                        df = apply_records(df, pending)
+                        published_at = datetime.fromtimestamp(pending[-1].published_at)
+                        logger.info(f"Replayed {len(pending)} delta records onto the {name} checkpoint")
+                elif os.path.exists(csv_path):
+                    df = pd.read_csv(csv_path)
+                    published_at = datetime.fromtimestamp(os.path.getmtime(csv_path))
+                else:
+                    continue
+                if not df.empty:
+                    self.store.publish(name, df, published_at)
+            except Exception as e:
+                logger.warning(f"Could not load persisted {name} snapshot: {str(e)}")
+        live = self.store.get("live")
+        if live is not None:
+            # The first merge then extends the restored table instead of starting from one shard
+            try:
+                self.universe.refresh()
+                self.scheduler.set_universe(self.universe.as_list(), self.universe.index)
+                self.scheduler.seed(live.data, live.published_at.timestamp())
+            except Exception as e:
+                logger.warning(f"Could not seed the refresh scheduler: {str(e)}")
+        predictions = self.store.get("predictions")
+        if predictions is not None:
+            self.stream.seed(predictions.data)
+        
+    def register_metrics(self):
+        """Expose queue depths, snapshot ages, cache and rate-control state as scrape-time gauges"""
+        queue_depth = REGISTRY.gauge('nse_queue_depth', 'Items waiting in internal queues')
+        queue_depth.set_function(self.stream.queue.qsize, queue='stream')
+        queue_depth.set_function(self.error_queue.qsize, queue='errors')
+        
+        snapshot_age = REGISTRY.gauge('nse_snapshot_age_seconds', 'Seconds since a snapshot was published')
+        for name in ("live", "predictions"):
+            snapshot_age.set_function(lambda name=name: self.snapshot_age(name), snapshot=name)
+        
+        cache = REGISTRY.gauge('nse_quote_cache', 'Quote cache state')
+        for key in ('size', 'hits', 'misses', 'revalidations', 'evictions', 'hit_ratio'):
+            cache.set_function(lambda key=key: self.quote_cache.metrics()[key], stat=key)
+        
+        rate = REGISTRY.gauge('nse_rate_control', 'Adaptive rate controller state')
+        for key in ('rate', 'concurrency_limit', 'in_flight', 'throttled', 'backoffs'):
+            rate.set_function(lambda key=key: self.rate_controller.metrics()[key], stat=key)
+    
+    def snapshot_age(self, name: str) -> Optional[float]:
+        """Seconds since the named snapshot was published, or None"""
+        snapshot = self.store.get(name)
+        if snapshot is None:
+            return None
+        return (datetime.now() - snapshot.published_at).total_seconds()
+        
+    def get_system_status(self) -> Dict[str, Any]:
+        """Get comprehensive system status"""
+        status = {
+            'has_live_data': self.store.get("live") is not None,
+            'model_ready': self.models.get() is not None,
+            'model_info': self.models.info(),
+            'has_predictions': self.store.get("predictions") is not None,
+            'is_fetching': self.is_fetching,
+            'last_fetch': self.last_fetch_time,
+            'last_successful_fetch': self.last_successful_fetch,
+            'data_freshness': self.get_data_freshness(),
+            'market_phase': self.calendar.phase(),
+            'rate_control': self.rate_controller.metrics(),
+            'quote_cache': self.quote_cache.metrics(),
+            'error_count': len(self.recent_errors)
+        }
+        return status
+    
+    def publish_status(self):
+        """Write the status readers need (no snapshot data) to nse_status.json"""
+        while not self.error_queue.empty():
+            self.recent_errors.append({'at': datetime.now().isoformat(timespec='seconds'),
+                                       'error': self.error_queue.get_nowait()})
+        while not self.status_queue.empty():
+            self.status_queue.get_nowait()
+        
+        status = self.get_system_status()
+        model_info = status['model_info']
+        status.update({
+            'model_info': ({'version': model_info.version, 'loaded_at': model_info.loaded_at.isoformat(),
+                            'metadata': model_info.metadata}
+                           if model_info else None),
+            'last_fetch': self.last_fetch_time.isoformat() if self.last_fetch_time else None,
+            'last_successful_fetch': (self.last_successful_fetch.isoformat()
+                                      if self.last_successful_fetch else None),
+            'stages': stage_summary(),
+            'worker_cycles': {result: int(WORKER_CYCLES.value(result=result)) for result in ('success', 'error')},
+            'stream_queue': self.stream.queue.qsize(),
+            'rankings': self.rankings.summary(),
+            'recent_errors': list(self.recent_errors),
+            'pid': os.getpid(),
+            'published_at': datetime.now().isoformat(),
+        })
+        try:
+            atomic_write_bytes(STATUS_PATH, json.dumps(status, default=str).encode('utf-8'),
+                               skip_unchanged=False)
+        except Exception as e:
+            logger.warning(f"Could not publish status: {str(e)}")
+    
+    def get_data_freshness(self) -> str:
+        """Check how fresh the data is"""
+        snapshot = self.store.get("live")
+        return data_freshness(snapshot.published_at if snapshot else None)
+    
+    def safe_fetch_data(self, full_universe: bool = False) -> bool:
+        """Safely fetch data with comprehensive error handling"""
+        if self.is_fetching:
+            return False
+            
+        try:
+            self.is_fetching = True
+            current_time = datetime.now()
+            
+            # Rate limiting check
+            if (self.last_fetch_time and 
+                (current_time - self.last_fetch_time).total_seconds() < self.fetch_interval):
+                return False
+            
+            logger.info("Starting safe data fetch...")
+            
+            # Symbol universe; a stat call unless symbols.csv changed
+            with stage_timer('symbol_load'):
+                diff = self.universe.refresh()
+            symbols = self.universe.as_list()
+            if not symbols:
+                raise ValueError(f"No symbols in {self.universe.path}")
+            if diff is not None:
+                for sym in diff.removed:
+                    self.rankings.remove(sym)
+            
+            # Next shard of the rotation plus the stalest/most volatile symbols
+            self.scheduler.set_universe(symbols, self.universe.index)
+            self.features.set_universe(symbols, self.universe.index)
+            limited_symbols = symbols if full_universe else self.scheduler.next_shard()
+                
+            jitter = random.uniform(2, 5)
+            time.sleep(jitter)
+            
+            # Fetch live data with retry logic
+            for attempt in range(self.max_retries):
+                try:
+                    # Each quote is handed to the micro-batch predictor as it lands, without blocking the loop
+                    with stage_timer('fetch'):
+                        shard_df = fetch_nse_live_data(limited_symbols, output_path=None, snapshot_path=None,
+                                                       on_result=self.stream.submit_nowait,
+                                                       controller=self.rate_controller,
+                                                       cache=self.quote_cache)
+                    break
+                except Exception as e:
+                    logger.warning(f"Data fetch attempt {attempt + 1} failed: {str(e)}")
+                    if attempt == self.max_retries - 1:
+                        raise e
+                    time.sleep(self.rate_limit_delay * (attempt + 1))
+            
+            # Merge the shard into the persistent snapshot; only rows that moved go downstream
+            snapshot = self.scheduler.merge(shard_df)
+            changes = self.scheduler.changes()
+            self.store.publish("live", snapshot)
+            with stage_timer('write'):
+                self.deltas.append("live", changes, COLUMNS[1:])
+            
+            # Archive the changed ticks
+            if self.history is not None and not changes.empty:
+                try:
+                    with stage_timer('history'):
+                        self.history.append(changes, current_time)
+                except Exception as e:
+                    logger.warning(f"Tick history append failed: {str(e)}")
+            
+            self.last_fetch_time = current_time
+            self.last_successful_fetch = current_time
+            logger.info(f"Successfully fetched data for {len(limited_symbols)} symbols "
+                        f"({len(changes)} changed, {len(snapshot)}/{len(symbols)} in snapshot, max age "
+                        f"{self.scheduler.max_age_bound(self.fetch_interval):.0f}s)")
+            return True
+            
+        except Exception as e:
+            error_msg = f"Data fetch error: {str(e)}"
+            logger.error(error_msg)
+            self.error_queue.put(error_msg)
+            return False
+        finally:
+            self.is_fetching = False
+    
+    def safe_predict_profit(self) -> Optional[pd.DataFrame]:
+        """Safely predict profits with validation"""
+        try:
+            # Validate live snapshot
+            snapshot = self.store.get("live")
+            if snapshot is None:
+                logger.warning("No live data snapshot published yet")
+                return None
+            
+            df = snapshot.data
+            if df.empty:
+                logger.warning("Live data snapshot is empty")
+                return None
+            
+            # Clean data
+            df = df.dropna()
+            if df.empty:
+                logger.warning("No valid data after cleaning")
+                return None
+            
+            # Resident model; hot-reloaded by the registry when the file changes
+            loaded = self.models.get()
+            if loaded is None:
+                logger.error("Prediction model not found")
+                return None
+            
+            # Validate required columns
+            required_columns = ['OPEN', 'HIGH', 'LOW', 'PREVCLOSE', 'LAST']
+            missing_columns = [col for col in required_columns if col not in df.columns]
+            if missing_columns:
+                logger.error(f"Missing required columns: {missing_columns}")
+                return None
+            
+            # Make predictions (one dot product for linear models, sharded across processes if enabled)
+            with stage_timer('predict'):
+                scoring = (self.features.attach(df, loaded.engine.columns)
+                           if needs_rolling(loaded.engine.columns) else df)
+                if self.pool_scorer is not None:
+                    df['PREDICTED_PROFIT'] = self.pool_scorer.score_frame(scoring, loaded)
+                else:
+                    df['PREDICTED_PROFIT'] = loaded.engine.score_frame(scoring)
+            
+            self.scored_version = loaded.info.version
+            
+            # Publish predictions
+            self.store.publish("predictions", df)
+            self.rankings.reset(df)
+            if self.persist_csv:
+                atomic_write_csv(df, "nse_live_with_profit.csv")
+            logger.info(f"Successfully predicted profits for {len(df)} stocks")
+            return df
+            
+        except Exception as e:
+            error_msg = f"Prediction error: {str(e)}"
+            logger.error(error_msg)
+            self.error_queue.put(error_msg)
+            return None
+    
+    def rescore_on_model_change(self):
+        """Score the whole snapshot at once (on the pool if enabled) when the model is new.
+
+        The stream only re-scores symbols as their quotes arrive, so without
+        this a new model would take a full rotation to reach every symbol.
+        Also covers predictions restored from disk, whose model is unknown.
+        """
+        loaded = self.models.get()
+        if loaded is None or loaded.info.version == self.scored_version or self.store.get("live") is None:
+            return
+        df = self.safe_predict_profit()
+        if df is not None:
+            self.stream.seed(df)
+            self.checkpoint()
+    
+    def persist_predictions(self):
+        """Append this cycle's re-scored rows to the delta log, checkpointing every few cycles"""
+        scored = self.stream.drain_scored()
+        with stage_timer('write'):
+            self.deltas.append("predictions", scored, PREDICTION_COLUMNS[1:])
+        
+        if self.cycles_since_checkpoint is not None:
+            self.cycles_since_checkpoint += 1
+            if self.cycles_since_checkpoint < self.checkpoint_every:
+                return
+        self.checkpoint()
+    
+    def checkpoint(self):
+        """Write full snapshots (and CSVs) and start a fresh delta log on top of them"""
+        live = self.store.get("live")
+        predictions = self.store.get("predictions")
+        with stage_timer('checkpoint'):
+            live_seq = write_snapshot(LIVE_SNAPSHOT, live.data) if live else 0
+            predictions_seq = (write_snapshot(PREDICTIONS_SNAPSHOT, predictions.data, columns=PREDICTION_COLUMNS[1:])
+                               if predictions else 0)
+            if self.persist_csv:
+                if live:
+                    atomic_write_csv(live.data, "nse_live.csv")
+                if predictions:
+                    atomic_write_csv(predictions.data, "nse_live_with_profit.csv")
+            self.deltas.start_epoch(live_seq, predictions_seq)
+        self.cycles_since_checkpoint = 0
+    
+    def compact_history(self):
+        """Once a day, fold the previous days' tick cycles into one file each"""
+        today = datetime.now().date()
+        if self.history is None or self.last_compaction_day == today:
+            return
+        try:
+            self.history.compact_closed_days(today)
+            self.last_compaction_day = today
+        except Exception as e:
+            logger.warning(f"Tick history compaction failed: {str(e)}")
+    
+    def background_worker(self):
+        """Main background worker with enhanced error handling"""
+        consecutive_errors = 0
+        max_consecutive_errors = 5
+        
+        # Score whatever live data survived a restart, then stream from here on
+        self.rescore_on_model_change()
+        self.stream.start()
+        
+        while True:
+            try:
+                # Outside the trading session there is nothing to fetch
+                action = self.session.next_action()
+                if not action.fetch:
+                    logger.info(f"Market {action.phase}; idling {action.sleep:.0f}s until the next session")
+                    self.publish_status()
+                    time.sleep(action.sleep)
+                    continue
+                
+                # Fetch data; quotes are scored as they arrive
+                if self.safe_fetch_data(full_universe=action.full_universe):
+                    consecutive_errors = 0
+                    self.session.mark_fetched(action)
+                    
+                    if self.stream.wait_idle(timeout=self.fetch_interval):
+                        self.persist_predictions()
+                        self.rescore_on_model_change()
+                        self.quote_cache.save()
+                        self.compact_history()
+                        self.status_queue.put("success")
+                        WORKER_CYCLES.inc(result='success')
+                        logger.info(f"Streamed predictions for {len(self.stream.table)} stocks "
+                                    f"(last batch latency {(self.stream.last_latency or 0) * 1000:.1f}ms)")
+                    else:
+                        consecutive_errors += 1
+                        WORKER_CYCLES.inc(result='error')
+                else:
+                    consecutive_errors += 1
+                    WORKER_CYCLES.inc(result='error')
+                
+                self.publish_status()
+                
+                # Adaptive sleep based on errors
+                if consecutive_errors > 0:
+                    sleep_time = min(self.fetch_interval * (1 + consecutive_errors), 1800)  # Max 30 min
+                    logger.warning(f"Sleeping for {sleep_time}s due to {consecutive_errors} consecutive errors")
+                    time.sleep(sleep_time)
+                else:
+                    time.sleep(action.sleep)
+                
+                # Emergency stop if too many consecutive errors
+                if consecutive_errors >= max_consecutive_errors:
+                    logger.critical("Too many consecutive errors, stopping background worker")
+                    self.error_queue.put("Background worker stopped due to repeated failures")
+                    self.publish_status()
+                    break
+                    
+            except Exception as e:
+                consecutive_errors += 1
+                WORKER_CYCLES.inc(result='error')
+                error_msg = f"Background worker critical error: {str(e)}"
+                logger.critical(error_msg)
+                self.error_queue.put(error_msg)
+                time.sleep(600)  # 10 minutes on critical error
+
+
+class SnapshotClient:
+    """Read-only view of what the engine publishes, for any number of dashboards.
+
+    Checkpoints are memory-mapped and only re-mapped when the file is
+    replaced; delta records appended since are applied on top of the
+    copied-out DataFrame. Frames and the parsed status are cached until the
+    next publish, so a rerun with nothing new does no work.
+    """
+
+    def __init__(self, live_path: str = LIVE_SNAPSHOT, predictions_path: str = PREDICTIONS_SNAPSHOT,
+                 status_path: str = STATUS_PATH, delta_path: str = DELTA_LOG):
+        self.readers = {"live": MmapSnapshotReader(live_path),
+                        "predictions": MmapSnapshotReader(predictions_path)}
+        self.status_path = status_path
+        self.deltas = DeltaLogReader(delta_path)
+        self._epoch_records = []  # Every delta record of the current log epoch
+        self._frames: Dict[str, list] = {}  # name -> [checkpoint key, frame, published_at, records applied]
+        self._views: Dict[tuple, tuple] = {}
+        self._status = ({}, None)
+        self._lock = threading.Lock()  # Shared by every session's script thread
+
+    def snapshot(self, name: str):
+        """(DataFrame, published_at) for "live" or "predictions", or (None, None)"""
+        with self._lock:
+            try:
+                mapped = self.readers[name].read()
+            except Exception as e:
+                logger.warning(f"Could not map {name} snapshot: {str(e)}")
+                return None, None
+            if mapped is None:
+                return None, None
+            cached = self._frames.get(name)
+            if cached is None or cached[0] != (mapped.seq, mapped.published_at):
+                cached = [(mapped.seq, mapped.published_at), mapped.to_frame(),
+                          datetime.fromtimestamp(mapped.published_at), 0]
+                self._frames[name] = cached
+            self._poll_deltas()
+            self._apply_deltas(name, cached)
+            return cached[1], cached[2]
+
+    def _poll_deltas(self):
+        try:
+            new_epoch, records = self.deltas.poll()
+        except Exception as e:
+            logger.warning(f"Could not read delta log: {str(e)}")
+            return
+        if new_epoch:
+            self._epoch_records = []
+            for cached in self._frames.values():
+                cached[3] = 0
+        self._epoch_records.extend(records)
+
+    def _apply_deltas(self, name: str, cached: list):
+        """Upsert the epoch's unapplied records into a frame built from the matching checkpoint"""
+        epoch = self.deltas.epoch
+        if epoch is None or epoch.get(name) != cached[0][0] or cached[3] >= len(self._epoch_records):
+            return
+        pending = [r for r in self._epoch_records[cached[3]:] if r.kind == name]
+        cached[3] = len(self._epoch_records)
+        if not pending:
+            return
+        cached[1] = apply_records(cached[1], pending)
+        cached[2] = datetime.fromtimestamp(pending[-1].published_at)
+
+    def snapshot_version(self, name: str):
+        """Checkpoint key and applied delta count of the named snapshot as last read, or None"""
+        cached = self._frames.get(name)
+        return (cached[0], cached[3]) if cached else None
+
+    def view(self, name: str, key: str, build):
+        """``build(frame)`` memoised per snapshot version under ``key``, shared by all sessions"""
+        frame, _ = self.snapshot(name)
+        if frame is None:
+            return None
+        return self._memoised((name, key), self.snapshot_version(name), lambda: build(frame))
+
+    def status_view(self, fields: tuple, key: str, build):
+        """``build(status)`` memoised per value of the status ``fields`` under ``key``, shared by all sessions.
+
+        The key is the fields' content, not the status file's mtime, which
+        changes on every engine cycle whether or not the fields did.
+        """
+        status = self.get_system_status()
+        digest = json.dumps([status.get(field) for field in fields], sort_keys=True, default=str)
+        return self._memoised(("status", key), digest, lambda: build(status))
+
+    def _memoised(self, slot: tuple, version, build):
+        with self._lock:
+            cached = self._views.get(slot)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        result = build()
+        with self._lock:
+            self._views[slot] = (version, result)
+        return result
+
+    def engine_status(self) -> Dict[str, Any]:
+        try:
+            stat = os.stat(self.status_path)
+        except FileNotFoundError:
+            return {}
+        if self._status[1] != stat.st_mtime_ns:  # Re-parse only after the engine republishes
+            try:
+                with open(self.status_path, 'rb') as f:
+                    self._status = (json.loads(f.read()), stat.st_mtime_ns)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read engine status: {str(e)}")
+        return self._status[0]
+
+    def get_system_status(self) -> Dict[str, Any]:
+        """The engine's status, with data presence and freshness taken from the snapshots"""
+        live, live_at = self.snapshot("live")
+        status = dict(self.engine_status())
+        status.update({
+            'has_live_data': live is not None,
+            'has_predictions': os.path.exists(self.readers["predictions"].path),
+            'data_freshness': data_freshness(live_at),
+            'live_age': (datetime.now() - live_at).total_seconds() if live_at else None,
+            'engine_pid': ServiceLock().holder_pid(),
+        })
+        status.setdefault('market_phase', MarketCalendar().phase())
+        status.setdefault('model_ready', False)
+        return status
+
+
+def start_engine(lock: ServiceLock, prediction_workers: int = 0, persist_csv: bool = True,
+                 metrics_port: Optional[int] = 9108) -> Optional[threading.Thread]:
+    """Start the engine on a background thread if no other process runs one.
+
+    Returns None when another process holds ``lock``; otherwise the caller
+    keeps ``lock`` for as long as the engine should run.
+    """
+    if not lock.acquire():
+        logger.info(f"NSE engine already running (pid {lock.holder_pid()}); not starting another")
+        return None
+    if metrics_port:
+        start_http_server(metrics_port)  # Prometheus scrape endpoint
+    predictor = RobustNSEPredictor(prediction_workers=prediction_workers, persist_csv=persist_csv)
+    thread = threading.Thread(target=predictor.background_worker, name='nse-engine', daemon=True)
+    thread.start()
+    logger.info(f"NSE engine started (pid {os.getpid()})")
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NSE fetch/predict engine")
+    parser.add_argument('--prediction-workers', type=int, default=0,
+                        help='score full-snapshot rescores (startup, new model) on this many processes '
+                             '(0 = in process)')
+    parser.add_argument('--metrics-port', type=int, default=9108, help='0 disables /metrics')
+    parser.add_argument('--no-csv', action='store_true', help='skip the CSV persistence sinks')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('nse_predictor.log'),
+            logging.StreamHandler()
+        ]
+    )
+    lock = ServiceLock()
+    thread = start_engine(lock, args.prediction_workers, not args.no_csv, args.metrics_port or None)
+    if thread is None:
+        raise SystemExit(1)
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        logger.info("NSE engine stopped")
+    finally:
+        lock.release()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import atexit
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model_registry import LoadedModel, load_model
+from scoring import ScoringEngine, feature_matrix
+
+logger = logging.getLogger(__name__)
+
+# The service forks from a process that already runs the stream, metrics and
+# (embedded) Streamlit threads; forking that could copy a held lock into the
+# worker. Workers need nothing from the parent but the model bytes.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Per-worker state, populated by the pool initializer
+_worker_engine: Optional[ScoringEngine] = None
+_worker_version: Optional[str] = None
+_worker_segments: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a parent-owned segment once per worker and keep it mapped"""
+    segment = _worker_segments.get(name)
+    if segment is None:
+        try:
+            segment = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            segment = shared_memory.SharedMemory(name=name)
+        _worker_segments[name] = segment
+    return segment
+
+
+def _init_worker(payload: bytes, version: str):
+    """Load exactly the bytes the parent's registry validated, never the file on disk"""
+    global _worker_engine, _worker_version
+    _, _worker_engine, _ = load_model(payload)
+    _worker_version = version
+
+
+def _score_shard(version: str, in_name: str, out_name: str,
+                 shape: Tuple[int, int], start: int, stop: int) -> int:
+    """Score rows [start, stop) of the shared input matrix into the shared output vector"""
+    if version != _worker_version:
+        raise RuntimeError(f"Worker holds model {_worker_version}, asked for {version}")
+    for stale in [name for name in _worker_segments if name not in (in_name, out_name)]:
+        _worker_segments.pop(stale).close()  # Parent grew and unlinked its buffers
+    n_rows, n_cols = shape
+    X = np.ndarray((n_rows, n_cols), dtype=np.float64, buffer=_attach(in_name).buf)
+    out = np.ndarray((n_rows,), dtype=np.float64, buffer=_attach(out_name).buf)
+    out[start:stop] = _worker_engine.score(X[start:stop])
+    return stop - start
+
+
+class ProcessPoolScorer:
+    """Score large snapshots on a pool of worker processes.
+
+    The feature matrix is written once into a shared-memory segment; each
+    worker scores a contiguous slice of rows and writes its predictions into
+    a shared output vector at the same positions, so results come back in
+    order with nothing pickled but slice bounds. Workers are started with the
+    model bytes the registry validated, and the pool is restarted when the
+    registry's version changes, so every shard is scored by the same model
+    the parent reports. Snapshots smaller than ``min_rows`` are scored in
+    process, where the pool round trip would cost more than it saves.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_rows: int = 1000,
+                 rows_per_task: Optional[int] = None):
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.min_rows = min_rows
+        self.rows_per_task = rows_per_task
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_version: Optional[str] = None
+        self._input: Optional[shared_memory.SharedMemory] = None
+        self._output: Optional[shared_memory.SharedMemory] = None
+        atexit.register(self.close)
+
+    def _ensure_pool(self, loaded: LoadedModel) -> ProcessPoolExecutor:
+        if self._pool is not None and self._pool_version != loaded.info.version:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._pool is None:
+            context = multiprocessing.get_context(START_METHOD)
+            if START_METHOD == 'forkserver':
+                # Import numpy/pandas and the model's library once in the server, not in every worker
+                context.set_forkserver_preload([__name__, type(loaded.model).__module__])
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                             initializer=_init_worker,
+                                             initargs=(loaded.payload, loaded.info.version))
+            self._pool_version = loaded.info.version
+            logger.info(f"Started prediction pool with {self.workers} workers for model {loaded.info.version}")
+        return self._pool
+
+    def _ensure_buffers(self, n_rows: int, n_cols: int):
+        """Grow-only shared segments, reused across cycles"""
+        in_bytes, out_bytes = n_rows * n_cols * 8, n_rows * 8
+        if self._input is None or self._input.size < in_bytes:
+            self._release(self._input)
+            self._input = shared_memory.SharedMemory(create=True, size=max(in_bytes * 2, 4096))
+        if self._output is None or self._output.size < out_bytes:
+            self._release(self._output)
+            self._output = shared_memory.SharedMemory(create=True, size=max(out_bytes * 2, 4096))
+
+    @staticmethod
+    def _release(segment: Optional[shared_memory.SharedMemory]):
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+    def score(self, X: np.ndarray, loaded: LoadedModel) -> np.ndarray:
+        """Predictions for ``X`` in row order, computed across the pool"""
+        n_rows, n_cols = X.shape
+        if n_rows < self.min_rows or self.workers < 2 or not loaded.payload:
+            return loaded.engine.score(X)
+
+        try:
+            return self._score_on_pool(X, loaded)
+        except Exception as e:
+            logger.warning(f"Prediction pool failed, scoring in process: {str(e)}")
+            self.close()
+            return loaded.engine.score(X)
+
+    def _score_on_pool(self, X: np.ndarray, loaded: LoadedModel) -> np.ndarray:
+        n_rows, n_cols = X.shape
+        pool = self._ensure_pool(loaded)
+        self._ensure_buffers(n_rows, n_cols)
+        shared_X = np.ndarray((n_rows, n_cols), dtype=np.float64, buffer=self._input.buf)
+        shared_X[:] = X
+        step = self.rows_per_task or -(-n_rows // self.workers)
+        futures = [pool.submit(_score_shard, loaded.info.version, self._input.name, self._output.name,
+                               (n_rows, n_cols), start, min(start + step, n_rows))
+                   for start in range(0, n_rows, step)]
+        scored = sum(f.result() for f in futures)
+        if scored != n_rows:
+            raise RuntimeError(f"Prediction pool scored {scored} of {n_rows} rows")
+        return np.ndarray((n_rows,), dtype=np.float64, buffer=self._output.buf).copy()
+
+    def score_frame(self, df: pd.DataFrame, loaded: LoadedModel) -> np.ndarray:
+        return self.score(feature_matrix(df, loaded.engine.columns), loaded)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self._release(self._input)
+        self._release(self._output)
+        self._input = self._output = None
@@ -0,0 +1,155 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from atomic_io import atomic_write_bytes
+from market_calendar import MarketCalendar
+from quote_parser import QuoteRow
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    __slots__ = ('row', 'fetched_at', 'expires_at', 'etag', 'last_modified', 'unchanged_count')
+
+    def __init__(self, row, fetched_at, etag=None, last_modified=None, unchanged_count=0):
+        self.row = row
+        self.fetched_at = fetched_at
+        self.expires_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.unchanged_count = unchanged_count
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class QuoteCache:
+    """LRU cache of quote rows in front of the NSE quote endpoint.
+
+    TTLs are per symbol: ``market_ttl`` while the market is open,
+    ``idle_ttl`` once a symbol's LAST has not moved for ``idle_after``
+    consecutive fetches, and ``closed_ttl`` whenever ``market_open(ts)``
+    (by default ``MarketCalendar.is_open``) says trading is not live. Expired
+    entries keep their ETag / Last-Modified so the fetcher can revalidate
+    with a conditional request. With ``path`` set, the cache is saved to
+    and loaded from disk so a restart starts warm.
+    """
+
+    def __init__(self, max_entries: int = 4096, market_ttl: float = 15.0, idle_ttl: float = 120.0,
+                 closed_ttl: float = 3600.0, idle_after: int = 3, path: Optional[str] = None,
+                 market_open=None):
+        self.max_entries = max_entries
+        self.market_ttl = market_ttl
+        self.idle_ttl = idle_ttl
+        self.closed_ttl = closed_ttl
+        self.idle_after = idle_after
+        self.path = path
+        self.market_open = market_open or MarketCalendar().is_open
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+
+    def ttl_for(self, entry: CacheEntry, now: float) -> float:
+        if not self.market_open(now):
+            return self.closed_ttl
+        if entry.unchanged_count >= self.idle_after:
+            return self.idle_ttl
+        return self.market_ttl
+
+    def get(self, sym: str, now: Optional[float] = None) -> Optional[QuoteRow]:
+        """Fresh cached row for ``sym``, or None on a miss / expiry"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(sym)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(sym)
+                self.hits += 1
+                return entry.row
+            self.misses += 1
+            return None
+
+    def validators(self, sym: str) -> Dict[str, str]:
+        """Conditional request headers for an expired entry, if it has any"""
+        entry = self._entries.get(sym)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def put(self, sym: str, row: QuoteRow, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            previous = self._entries.get(sym)
+            unchanged = 0
+            if previous is not None and previous.row.LAST == row.LAST:
+                unchanged = previous.unchanged_count + 1
+            entry = CacheEntry(row, now, etag, last_modified, unchanged)
+            entry.expires_at = now + self.ttl_for(entry, now)
+            self._entries[sym] = entry
+            self._entries.move_to_end(sym)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, sym: str, now: Optional[float] = None) -> Optional[QuoteRow]:
+        """Handle a 304: the cached row is still current, so extend its TTL"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(sym)
+            if entry is None:
+                return None
+            entry.unchanged_count += 1
+            entry.expires_at = now + self.ttl_for(entry, now)
+            self._entries.move_to_end(sym)
+            self.revalidations += 1
+            return entry.row
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            payload = pickle.dumps(dict(self._entries), protocol=pickle.HIGHEST_PROTOCOL)
+        atomic_write_bytes(self.path, payload)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                entries = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load quote cache {self.path}: {str(e)}")
+            return
+        entries = {s: e for s, e in entries.items() if isinstance(e.row, QuoteRow)}
+        with self._lock:
+            self._entries = OrderedDict(sorted(entries.items(), key=lambda item: item[1].fetched_at))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"Loaded {len(self._entries)} cached quotes from {self.path}")
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'revalidations': self.revalidations,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,74 @@
+from typing import NamedTuple, Optional
+
+import orjson
+
+COLUMNS = ['SYMBOL', 'OPEN', 'HIGH', 'LOW', 'PREVCLOSE', 'LAST']
+
+PRICE_INFO_KEY = b'"priceInfo"'
+
+
+class QuoteRow(NamedTuple):
+    """One nse_live.csv row; a plain tuple, so it is cheap to build and pass around"""
+    SYMBOL: str
+    OPEN: Optional[float]
+    HIGH: Optional[float]
+    LOW: Optional[float]
+    PREVCLOSE: Optional[float]
+    LAST: Optional[float]
+
+
+def _row_from_price_info(sym, price_info):
+    high_low = price_info.get('intraDayHighLow') or {}
+    return QuoteRow(
+        sym,
+        price_info.get('open'),
+        high_low.get('max'),
+        high_low.get('min'),
+        price_info.get('previousClose'),
+        price_info.get('lastPrice'),
+    )
+
+
+def quote_to_row(sym, quote) -> QuoteRow:
+    """Flatten an already-decoded nse_quote payload"""
+    return _row_from_price_info(sym, quote.get('priceInfo') or {})
+
+
+def _price_info_span(raw: bytes):
+    """Byte span of the priceInfo object, or None if it can't be located cheaply.
+
+    priceInfo only nests plain objects one level deep (intraDayHighLow,
+    weekHighLow), so its end is the first '}' not closing one of those.
+    """
+    key = raw.find(PRICE_INFO_KEY)
+    if key < 0:
+        return None
+    start = raw.find(b'{', key + len(PRICE_INFO_KEY))
+    if start < 0 or raw[key + len(PRICE_INFO_KEY):start].strip() != b':':
+        return None  # Missing, or priceInfo is not an object (e.g. null)
+    pos = start + 1
+    while True:
+        close = raw.find(b'}', pos)
+        if close < 0:
+            return None
+        nested = raw.find(b'{', pos, close)
+        if nested < 0:
+            return start, close + 1
+        pos = raw.find(b'}', nested) + 1
+        if pos == 0:
+            return None
+
+
+def parse_quote(sym, raw: bytes) -> QuoteRow:
+    """Decode only the priceInfo object from a raw quote-equity response body.
+
+    Falls back to decoding the whole document when the slice is not valid
+    JSON on its own (e.g. an unexpected nesting shape).
+    """
+    span = _price_info_span(raw)
+    if span is not None:
+        try:
+            return _row_from_price_info(sym, orjson.loads(raw[span[0]:span[1]]))
+        except orjson.JSONDecodeError:
+            pass
+    return quote_to_row(sym, orjson.loads(raw))
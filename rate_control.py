@@ -0,0 +1,127 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+THROTTLE_STATUSES = (403, 429, 503)
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 10.0) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveRateController:
+    """AIMD controller for outbound quote requests.
+
+    Two limits apply together: a token bucket that caps the request rate,
+    and a concurrency limit on in-flight requests. Healthy responses
+    (success within ``latency_target``) grow both additively: about one
+    slot per window of requests and ``rate_step`` req/s per second. An
+    error, throttle response or latency spike cuts
+    both multiplicatively, at most once per ``cooldown`` so a burst of
+    simultaneous failures counts as one congestion signal.
+
+    The controller outlives individual event loops (every sweep runs its
+    own ``asyncio.run``), so its asyncio primitives are rebuilt per loop.
+    """
+
+    def __init__(self, rate: float = 100.0, min_rate: float = 2.0, max_rate: float = 400.0,
+                 rate_step: float = 10.0,
+                 concurrency: float = 32, min_concurrency: float = 2, max_concurrency: float = 64,
+                 latency_target: float = 1.5, decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step  # req/s added per second of healthy responses
+        self.limit = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self.tokens = 1.0
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.backoffs = 0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._loop = None
+        self._cond: asyncio.Condition = None
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._cond = asyncio.Condition()
+            self.in_flight = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self._last_refill) * self.rate, max(self.rate, 1.0))
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait for a token and a free concurrency slot"""
+        self._bind()
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                break
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, ok: bool, latency: float, throttled: bool = False):
+        """Return the slot and feed the outcome into the AIMD loop"""
+        if ok and latency <= self.latency_target:
+            self.successes += 1
+            self.limit = min(self.limit + 1 / self.limit, self.max_concurrency)
+            self.rate = min(self.rate + self.rate_step / self.rate, self.max_rate)
+        else:
+            if ok:
+                self.successes += 1
+            else:
+                self.failures += 1
+            self.throttled += int(throttled)
+            self._decrease()
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.backoffs += 1
+        self.limit = max(self.limit * self.decrease_factor, self.min_concurrency)
+        self.rate = max(self.rate * self.decrease_factor, self.min_rate)
+
+    @asynccontextmanager
+    async def slot(self):
+        """``async with controller.slot() as outcome:`` set ``outcome['ok']``/``['throttled']``"""
+        await self.acquire()
+        outcome = {'ok': False, 'throttled': False}
+        started = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            await self.release(outcome['ok'], time.monotonic() - started, outcome['throttled'])
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'rate': round(self.rate, 2),
+            'concurrency_limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'successes': self.successes,
+            'failures': self.failures,
+            'throttled': self.throttled,
+            'backoffs': self.backoffs,
+        }
@@ -0,0 +1,133 @@
+import math
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from quote_parser import COLUMNS
+
+
+class RefreshScheduler:
+    """Rotate deterministically through the whole symbol universe in shards.
+
+    Each shard is mostly the next slice of a round-robin cursor, which bounds
+    how long any symbol can go unrefreshed. The remaining ``priority_fraction``
+    of the shard goes to the stalest / most volatile symbols outside that
+    slice. Fetched rows are merged into a persistent snapshot rather than
+    replacing it.
+
+    State is kept in arrays addressed by universe position (prices, last
+    refresh time, volatility), so merging a shard is a positional write
+    rather than a join on symbol strings.
+    """
+
+    def __init__(self, shard_size: int = 100, priority_fraction: float = 0.2,
+                 volatility_weight: float = 50.0):
+        self.shard_size = shard_size
+        self.priority_slots = min(int(shard_size * priority_fraction), shard_size - 1)
+        self.volatility_weight = volatility_weight
+        self.universe: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cursor = 0
+        self.changed = np.empty(0, dtype=np.intp)  # Positions whose values changed in the last merge
+        self._allocate(0)
+
+    def _allocate(self, n: int):
+        self.values = np.full((n, len(COLUMNS) - 1), np.nan)
+        self.present = np.zeros(n, dtype=bool)
+        self.last_refreshed = np.full(n, np.nan)
+        self.volatility = np.zeros(n)
+
+    def set_universe(self, symbols: List[str], index: Optional[Dict[str, int]] = None):
+        """Adopt a new symbol list, keeping state for symbols that remain"""
+        if symbols is self.universe or symbols == self.universe:
+            return
+        index = index if index is not None else {s: i for i, s in enumerate(symbols)}
+        if self.universe and self.cursor < len(self.universe):
+            # Resume the rotation from the same symbol where possible
+            self.cursor = index.get(self.universe[self.cursor], 0)
+        else:
+            self.cursor = 0
+
+        old = (self.values, self.present, self.last_refreshed, self.volatility)
+        kept = [(i, index[s]) for i, s in enumerate(self.universe) if s in index]
+        self._allocate(len(symbols))
+        if kept:
+            src, dst = (np.array(p, dtype=np.intp) for p in zip(*kept))
+            for new, previous in zip((self.values, self.present, self.last_refreshed, self.volatility), old):
+                new[dst] = previous[src]
+        self.universe = symbols
+        self.index = index
+
+    @property
+    def rotation_slots(self) -> int:
+        return max(self.shard_size - self.priority_slots, 1)
+
+    def max_age_bound(self, interval: float) -> float:
+        """Worst-case seconds between refreshes of any one symbol"""
+        return math.ceil(len(self.universe) / self.rotation_slots) * interval
+
+    def next_shard(self, now: Optional[float] = None) -> List[str]:
+        """Return the next batch of symbols to fetch and advance the cursor"""
+        n = len(self.universe)
+        if n <= self.shard_size:
+            return list(self.universe)
+
+        now = time.time() if now is None else now
+        rotation = (self.cursor + np.arange(self.rotation_slots)) % n
+        self.cursor = (self.cursor + self.rotation_slots) % n
+        if self.priority_slots <= 0:
+            return [self.universe[i] for i in rotation]
+
+        # Staleness weighted by volatility; never-refreshed symbols first
+        priority = (now - self.last_refreshed) * (1 + self.volatility_weight * self.volatility)
+        priority[np.isnan(self.last_refreshed)] = np.inf
+        priority[rotation] = -np.inf
+        picks = np.argpartition(priority, -self.priority_slots)[-self.priority_slots:]
+        picks = picks[np.argsort(-priority[picks], kind='stable')]
+        return [self.universe[i] for i in rotation] + [self.universe[i] for i in picks]
+
+    def merge(self, df: pd.DataFrame, now: Optional[float] = None) -> pd.DataFrame:
+        """Fold freshly fetched rows into the snapshot and return it in universe order"""
+        now = time.time() if now is None else now
+        if df is not None and not df.empty:
+            positions = np.fromiter((self.index.get(s, -1) for s in df['SYMBOL']), dtype=np.intp)
+            known = positions >= 0
+            positions = positions[known]
+            fresh = df[COLUMNS[1:]].to_numpy(dtype=np.float64, na_value=np.nan)[known]
+            previous = self.values[positions]
+            same = (previous == fresh) | (np.isnan(previous) & np.isnan(fresh))
+            self.changed = np.unique(positions[~self.present[positions] | ~same.all(axis=1)])
+            self.values[positions] = fresh
+            self.present[positions] = True
+            self.last_refreshed[positions] = now
+
+            last, prev = fresh[:, COLUMNS.index('LAST') - 1], fresh[:, COLUMNS.index('PREVCLOSE') - 1]
+            measurable = ~np.isnan(last) & ~np.isnan(prev) & (prev != 0)
+            self.volatility[positions[measurable]] = np.abs(last - prev)[measurable] / prev[measurable]
+        else:
+            self.changed = np.empty(0, dtype=np.intp)
+        return self.snapshot()
+
+    def seed(self, df: pd.DataFrame, refreshed_at: float):
+        """Restore rows persisted by an earlier run, as last refreshed at ``refreshed_at``"""
+        self.merge(df, now=refreshed_at)
+        self.changed = np.empty(0, dtype=np.intp)  # Nothing new to publish downstream
+
+    def snapshot(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Every symbol fetched so far (or just ``rows``), in universe order"""
+        rows = np.flatnonzero(self.present) if rows is None else rows
+        df = pd.DataFrame(self.values[rows], columns=COLUMNS[1:])
+        df.insert(0, 'SYMBOL', [self.universe[i] for i in rows])
+        return df
+
+    def changes(self) -> pd.DataFrame:
+        """Rows that are new or whose prices moved in the last merge"""
+        return self.snapshot(self.changed)
+
+    def ages(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Seconds since each symbol was last refreshed (missing = never)"""
+        now = time.time() if now is None else now
+        refreshed = np.flatnonzero(~np.isnan(self.last_refreshed))
+        return {self.universe[i]: now - self.last_refreshed[i] for i in refreshed}
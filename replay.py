@@ -0,0 +1,327 @@
+"""Offline replay and backtest of the predictor on recorded ticks.
+
+    python replay.py tick_history --interval 20 --horizon 1 --output replay_report.json
+    python replay.py recorded_ticks.csv --start 2025-01-06T09:15 --end 2025-01-06T15:30
+
+Recorded quotes (the tick history dataset, a Parquet file, or CSVs with a
+TS column) are bucketed onto a virtual clock of ``interval`` seconds and
+carried forward per symbol, the way the live snapshot merges shards. Every
+bucket is scored with the same ScoringEngine the service uses. Predictions
+at t are compared against the realised LAST move from t to t + horizon,
+scored only where a quote arrived at t and another within (t, t + horizon].
+Nothing sleeps and nothing touches the network. Each session becomes its own
+(buckets x symbols) panel, so no quote is carried across the overnight gap
+and only one day is in memory at a time; the metrics are pooled at the end.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from features import ENGINEERED_COLUMNS, needs_rolling, replay_features
+from model_registry import load_model, unpack_model, validate_metadata
+from quote_parser import COLUMNS
+from scoring import FEATURE_COLUMNS, ScoringEngine
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = COLUMNS[1:]
+
+
+class ReplayPanel(NamedTuple):
+    times: pd.DatetimeIndex  # One per bucket of the virtual clock
+    symbols: np.ndarray
+    values: np.ndarray       # (buckets, symbols, PRICE_COLUMNS) float64, carried forward
+    fresh: np.ndarray        # (buckets, symbols) True where a new quote arrived
+
+
+class ReplayReport(NamedTuple):
+    summary: Dict[str, float]
+    per_bucket: pd.DataFrame
+    totals: Dict[str, float]  # Running sums behind the summary, for pooling sessions
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    frame = pd.read_csv(path)
+    if 'TS' not in frame.columns:
+        # A plain snapshot CSV (e.g. a saved nse_live.csv): stamp it with its mtime
+        frame['TS'] = pd.Timestamp(os.path.getmtime(path), unit='s')
+    return frame
+
+
+def iter_sessions(source: str, start=None, end=None) -> Iterator[pd.DataFrame]:
+    """Ticks one calendar day at a time, oldest first, so a long history never sits in memory.
+
+    ``source`` is a tick history root, a Parquet file, a CSV file or a
+    directory of CSVs (ordered by TS, or by file mtime for plain snapshots).
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if os.path.isdir(source) and not glob.glob(os.path.join(source, '*.csv')):
+        from tick_history import TickHistory  # pyarrow is optional for everything else
+        history = TickHistory(source)
+        for day in history.days():
+            day_start, day_end = pd.Timestamp(day), pd.Timestamp(day) + pd.Timedelta(days=1)
+            if (end is not None and day_start >= end) or (start is not None and day_end <= start):
+                continue
+            df = history.read(start=max(day_start, start) if start is not None else day_start,
+                              end=min(day_end, end) if end is not None else day_end)
+            if not df.empty:
+                yield df
+        return
+
+    if source.endswith('.parquet'):
+        chunks = iter([pd.read_parquet(source)])
+    elif os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, '*.csv')), key=os.path.getmtime)
+        chunks = (_read_csv(path) for path in paths)
+    else:
+        chunks = iter([_read_csv(source)])
+
+    pending = []
+    for chunk in chunks:
+        chunk['TS'] = pd.to_datetime(chunk['TS'])
+        if start is not None:
+            chunk = chunk[chunk['TS'] >= start]
+        if end is not None:
+            chunk = chunk[chunk['TS'] < end]
+        for _, day in chunk.groupby(chunk['TS'].dt.normalize(), sort=True):
+            if pending and day['TS'].iloc[0].normalize() != pending[0]['TS'].iloc[0].normalize():
+                yield pd.concat(pending, ignore_index=True).sort_values('TS', kind='stable')
+                pending = []
+            pending.append(day)
+    if pending:
+        yield pd.concat(pending, ignore_index=True).sort_values('TS', kind='stable')
+
+
+def build_panel(ticks: pd.DataFrame, interval: float = 20.0) -> ReplayPanel:
+    """Bucket ticks onto the virtual clock and carry each symbol's last quote forward"""
+    ts = ticks['TS'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    origin = ts.min()
+    step = int(interval * 1e9)
+    bucket = (ts - origin) // step
+    n_buckets = int(bucket.max()) + 1
+    codes, symbols = pd.factorize(ticks['SYMBOL'], sort=True)
+
+    values = np.full((n_buckets, len(symbols), len(PRICE_COLUMNS)), np.nan)
+    seen = np.zeros((n_buckets, len(symbols)), dtype=bool)
+    # Ticks are time-ordered, so keeping the last per cell keeps the latest quote in a bucket
+    cell = pd.Series(bucket * len(symbols) + codes).duplicated(keep='last').to_numpy()
+    keep = ~cell
+    values[bucket[keep], codes[keep]] = ticks[PRICE_COLUMNS].to_numpy(dtype=np.float64, na_value=np.nan)[keep]
+    seen[bucket[keep], codes[keep]] = True
+
+    # Forward fill along time: each cell points at the latest bucket that had a quote
+    source = np.where(seen, np.arange(n_buckets)[:, None], 0)
+    np.maximum.accumulate(source, axis=0, out=source)
+    values = values[source, np.arange(len(symbols))[None, :]]
+
+    times = pd.DatetimeIndex(origin + np.arange(n_buckets) * step)
+    return ReplayPanel(times, np.asarray(symbols, dtype=object), values, seen)
+
+
+def panel_features(panel: ReplayPanel, columns) -> np.ndarray:
+    """(buckets, symbols, len(columns)) raw and rolling features of every cell"""
+    blocks = {c: panel.values[:, :, PRICE_COLUMNS.index(c)] for c in columns if c in PRICE_COLUMNS}
+    if needs_rolling(columns):
+        rolling = replay_features(panel.values, panel.fresh)
+        blocks.update({c: rolling[:, :, i] for i, c in enumerate(ENGINEERED_COLUMNS) if c in columns})
+    return np.stack([blocks[c] for c in columns], axis=2)
+
+
+def score_panel(panel: ReplayPanel, engine: ScoringEngine, window: int = 256) -> np.ndarray:
+    """(buckets, symbols) predictions, scored ``window`` buckets per matrix call"""
+    n_buckets, n_symbols, _ = panel.values.shape
+    features = panel_features(panel, engine.columns)
+    predictions = np.full((n_buckets, n_symbols), np.nan)
+    for start in range(0, n_buckets, window):
+        block = features[start:start + window].reshape(-1, len(engine.columns))
+        valid = ~np.isnan(block).any(axis=1)
+        scores = np.full(len(block), np.nan)
+        if valid.any():
+            scores[valid] = engine.score(np.ascontiguousarray(block[valid]))
+        predictions[start:start + window] = scores.reshape(-1, n_symbols)
+    return predictions
+
+
+def _row_mean(x: np.ndarray) -> np.ndarray:
+    """Mean of each row ignoring NaNs; NaN for rows with no values"""
+    count = (~np.isnan(x)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.nansum(x, axis=1) / count, np.nan)
+
+
+def _row_corr(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson correlation of each row of a with the same row of b, ignoring NaNs"""
+    mask = ~np.isnan(a) & ~np.isnan(b)
+    n = mask.sum(axis=1)
+    a = np.where(mask, a, 0.0)
+    b = np.where(mask, b, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_a = a.sum(axis=1) / n
+        mean_b = b.sum(axis=1) / n
+        da = np.where(mask, a - mean_a[:, None], 0.0)
+        db = np.where(mask, b - mean_b[:, None], 0.0)
+        corr = (da * db).sum(axis=1) / np.sqrt((da ** 2).sum(axis=1) * (db ** 2).sum(axis=1))
+    corr[n < 3] = np.nan
+    return corr
+
+
+def realised_moves(panel: ReplayPanel, horizon: int) -> np.ndarray:
+    """(buckets, symbols) LAST move from t to t + horizon, NaN unless both ends are real quotes.
+
+    A move is defined only where a quote arrived in bucket t and at least one
+    more arrived within (t, t + horizon]; elsewhere one end is a carried-forward
+    price and the "move" would mostly be a spurious zero.
+    """
+    if horizon < 1:
+        raise ValueError(f"horizon must be at least 1 bucket, got {horizon}")
+    last = panel.values[:, :, PRICE_COLUMNS.index('LAST')]
+    realised = np.full_like(last, np.nan)
+    if len(last) > horizon:
+        quotes = np.cumsum(panel.fresh, axis=0)
+        quoted = panel.fresh[:-horizon] & (quotes[horizon:] > quotes[:-horizon])
+        realised[:-horizon] = np.where(quoted, last[horizon:] - last[:-horizon], np.nan)
+    return realised
+
+
+def evaluate(panel: ReplayPanel, predictions: np.ndarray, horizon: int = 1,
+             top_k: int = 5) -> ReplayReport:
+    """Compare predictions at t with the realised LAST move over the next ``horizon`` buckets"""
+    realised = realised_moves(panel, horizon)
+    pred = np.where(np.isnan(realised), np.nan, predictions)
+    valid = ~np.isnan(pred)
+    moved = valid & (realised != 0)
+
+    hits = (np.sign(pred) == np.sign(realised)) & moved
+    errors = np.where(valid, pred - realised, np.nan)
+    ranked_pred = pd.DataFrame(pred).rank(axis=1).to_numpy()
+    ranked_real = pd.DataFrame(np.where(valid, realised, np.nan)).rank(axis=1).to_numpy()
+
+    # Mean realised move of each bucket's top-K predicted symbols
+    order = np.argsort(np.where(valid, -pred, np.inf), axis=1, kind='stable')[:, :top_k]
+    top_moves = np.take_along_axis(np.where(valid, realised, np.nan), order, axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        per_bucket = pd.DataFrame({
+            'TS': panel.times,
+            'symbols': valid.sum(axis=1),
+            'directional_accuracy': hits.sum(axis=1) / moved.sum(axis=1),
+            'mae': _row_mean(np.abs(errors)),
+            'rank_ic': _row_corr(ranked_pred, ranked_real),
+            'top_k_move': _row_mean(top_moves),
+            'universe_move': _row_mean(np.where(valid, realised, np.nan)),
+        })
+    per_bucket = per_bucket[per_bucket['symbols'] > 0].reset_index(drop=True)
+
+    p, r = pred[valid], realised[valid]
+    totals = {
+        'observations': float(len(p)), 'moved': float(moved.sum()), 'hits': float(hits.sum()),
+        'abs_error': float(np.abs(p - r).sum()), 'sq_error': float(((p - r) ** 2).sum()),
+        'p': float(p.sum()), 'r': float(r.sum()),
+        'pp': float((p * p).sum()), 'rr': float((r * r).sum()), 'pr': float((p * r).sum()),
+    }
+    return ReplayReport(summarise(totals, per_bucket, len(panel.symbols)), per_bucket, totals)
+
+
+def summarise(totals: Dict[str, float], per_bucket: pd.DataFrame, symbols: int) -> Dict[str, float]:
+    """Summary metrics from pooled ``totals`` and per-bucket rows of one or more sessions"""
+    n = totals['observations']
+    pearson = None
+    if n > 2:
+        cov = totals['pr'] - totals['p'] * totals['r'] / n
+        var_p = totals['pp'] - totals['p'] ** 2 / n
+        var_r = totals['rr'] - totals['r'] ** 2 / n
+        if var_p > 0 and var_r > 0:
+            pearson = float(cov / np.sqrt(var_p * var_r))
+    return {
+        'buckets': int(len(per_bucket)),
+        'symbols': int(symbols),
+        'observations': int(n),
+        'directional_accuracy': totals['hits'] / totals['moved'] if totals['moved'] else None,
+        'mae': totals['abs_error'] / n if n else None,
+        'rmse': float(np.sqrt(totals['sq_error'] / n)) if n else None,
+        'pearson': pearson,
+        'mean_rank_ic': float(per_bucket['rank_ic'].mean()) if len(per_bucket) else None,
+        'top_k_mean_move': float(per_bucket['top_k_move'].mean()) if len(per_bucket) else None,
+        'universe_mean_move': float(per_bucket['universe_move'].mean()) if len(per_bucket) else None,
+    }
+
+
+def replay(source: str, model, start=None, end=None, interval: float = 20.0,
+           horizon: int = 1, top_k: int = 5) -> ReplayReport:
+    """Bucket, score and evaluate recorded ticks one session at a time and pool the metrics"""
+    if horizon < 1:
+        raise ValueError(f"horizon must be at least 1 bucket, got {horizon}")
+    started = time.perf_counter()
+    engine = model
+    if not isinstance(engine, ScoringEngine):
+        model, metadata = unpack_model(model)
+        validate_metadata(model, metadata)
+        engine = ScoringEngine(model, metadata['feature_names'] if metadata else FEATURE_COLUMNS)
+
+    frames, totals, symbols = [], {}, set()
+    n_ticks, first, last = 0, None, None
+    for ticks in iter_sessions(source, start, end):
+        panel = build_panel(ticks, interval)
+        report = evaluate(panel, score_panel(panel, engine), horizon, top_k)
+        frames.append(report.per_bucket)
+        totals = {k: totals.get(k, 0.0) + v for k, v in report.totals.items()}
+        symbols.update(panel.symbols)
+        n_ticks += len(ticks)
+        first = panel.times[0] if first is None else first
+        last = panel.times[-1]
+        logger.info(f"Session {panel.times[0].date()}: {len(ticks)} ticks "
+                    f"({len(panel.times)} buckets x {len(panel.symbols)} symbols)")
+    if not frames:
+        raise ValueError(f"No ticks found in {source}")
+
+    per_bucket = pd.concat(frames, ignore_index=True)
+    summary = summarise(totals, per_bucket, len(symbols))
+    summary.update({
+        'sessions': len(frames),
+        'ticks': n_ticks,
+        'start': str(first),
+        'end': str(last),
+        'interval_seconds': interval,
+        'horizon_buckets': horizon,
+        'replay_seconds': round(time.perf_counter() - started, 3),
+    })
+    logger.info(f"Replayed {n_ticks} ticks in {len(frames)} sessions in {summary['replay_seconds']:.2f}s")
+    return ReplayReport(summary, per_bucket, totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='tick history root, Parquet file, CSV file or directory of CSVs')
+    parser.add_argument('--model', default='profit_prediction_model.pkl')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--interval', type=float, default=20.0, help='virtual clock step in seconds')
+    parser.add_argument('--horizon', type=int, default=1, help='buckets ahead for the realised move')
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--output', default=None, help='write summary and per-bucket metrics as JSON')
+    args = parser.parse_args()
+    if args.horizon < 1:
+        parser.error("--horizon must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.model, 'rb') as f:
+        _, model, _ = load_model(f.read())
+    report = replay(args.source, model, args.start, args.end, args.interval, args.horizon, args.top_k)
+    print(json.dumps(report.summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': report.summary,
+                       'per_bucket': json.loads(report.per_bucket.to_json(orient='records', date_format='iso'))},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
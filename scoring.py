@@ -0,0 +1,74 @@
+import logging
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = ['OPEN', 'HIGH', 'LOW', 'PREVCLOSE', 'LAST']
+
+
+def feature_matrix(df: pd.DataFrame, columns: Sequence[str] = FEATURE_COLUMNS) -> np.ndarray:
+    """Contiguous float64 matrix of ``columns`` with NaNs filled by column means"""
+    X = np.ascontiguousarray(df[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan))
+    if np.isnan(X).any():
+        means = np.nanmean(X, axis=0)
+        X = np.where(np.isnan(X), means, X)
+    return X
+
+
+class ScoringEngine:
+    """Score feature matrices with a linear model's closed form.
+
+    Linear models (anything exposing 1-D ``coef_`` and a scalar
+    ``intercept_``) are reduced to ``X @ coef + intercept``. On construction
+    the closed form is checked against ``model.predict`` on a probe matrix;
+    other models, or a failed parity check, fall back to ``predict``.
+    """
+
+    def __init__(self, model, columns: Sequence[str] = FEATURE_COLUMNS):
+        self.model = model
+        self.columns = list(columns)
+        self.coef = None
+        self.intercept = 0.0
+        self._extract_linear()
+
+    @property
+    def is_linear(self) -> bool:
+        return self.coef is not None
+
+    def _extract_linear(self):
+        coef = getattr(self.model, 'coef_', None)
+        intercept = getattr(self.model, 'intercept_', None)
+        if coef is None or intercept is None:
+            return
+        coef = np.asarray(coef, dtype=np.float64)
+        if coef.ndim != 1 or coef.shape[0] != len(self.columns) or np.ndim(intercept) != 0:
+            return
+        self.coef = np.ascontiguousarray(coef)
+        self.intercept = float(intercept)
+        if not self._parity_ok():
+            logger.warning("Closed-form scores differ from model.predict; using predict")
+            self.coef = None
+
+    def _parity_ok(self) -> bool:
+        rng = np.random.default_rng(0)
+        probe = rng.uniform(1, 5000, size=(64, len(self.columns)))
+        expected = self._predict(probe)
+        return np.allclose(probe @ self.coef + self.intercept, expected, rtol=1e-9, atol=1e-6)
+
+    def _predict(self, X: np.ndarray) -> np.ndarray:
+        # Fall back to a DataFrame when the model was fitted with feature names
+        if getattr(self.model, 'feature_names_in_', None) is not None:
+            X = pd.DataFrame(X, columns=self.columns)
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Predictions for an (n, len(columns)) float64 matrix"""
+        if self.coef is not None:
+            return X @ self.coef + self.intercept
+        return self._predict(X)
+
+    def score_frame(self, df: pd.DataFrame) -> np.ndarray:
+        return self.score(feature_matrix(df, self.columns))
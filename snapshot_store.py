@@ -0,0 +1,40 @@
+import threading
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+
+import pandas as pd
+
+
+class Snapshot(NamedTuple):
+    version: int
+    data: pd.DataFrame
+    published_at: datetime
+
+
+class SnapshotStore:
+    """Process-wide store of versioned DataFrame snapshots.
+
+    The background worker publishes a fresh frame under a name ("live",
+    "predictions"); readers get the latest one with a dict lookup. Published
+    frames are private copies that are never mutated afterwards, so readers
+    can use them without locking but must copy before modifying.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Snapshot] = {}
+        self.version = 0
+
+    def publish(self, name: str, df: pd.DataFrame,
+                published_at: Optional[datetime] = None) -> Snapshot:
+        """Publish a copy of ``df`` as the newest snapshot for ``name``"""
+        data = df.copy()
+        with self._lock:
+            self.version += 1
+            snapshot = Snapshot(self.version, data, published_at or datetime.now())
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        """Latest snapshot for ``name``, or None if nothing was published yet"""
+        return self._snapshots.get(name)
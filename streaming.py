@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from features import needs_rolling
+from metrics import STREAM_DROPPED, stage_timer
+from quote_parser import COLUMNS, QuoteRow
+from scoring import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_COLUMNS = COLUMNS + ['PREDICTED_PROFIT']
+
+
+class MicroBatchPredictor:
+    """Score quote rows as they arrive instead of after a whole fetch cycle.
+
+    Fetchers ``submit()`` rows into a bounded queue (blocking when it is full,
+    which throttles the fetch loop); ``submit_nowait()`` is for callers on an
+    event loop and drops rows, counted in ``dropped_count``, instead. A
+    consumer thread drains the queue into micro-batches that flush when
+    ``max_batch`` rows are waiting or the oldest row has waited ``max_wait``
+    seconds. Each flush scores the batch with the registry's current engine,
+    upserts it into the prediction table and publishes the table as the
+    "predictions" snapshot. An optional ``RankingIndex`` is kept in step with
+    the table, and an optional ``RollingFeatures`` sees every fresh quote as a
+    tick and supplies the rolling indicators to models trained on them.
+
+    Rows identical to the last one submitted for the same symbol are not
+    re-scored, and scored rows are retained until ``drain_scored()`` so the
+    caller can publish just what changed.
+    """
+
+    def __init__(self, registry, store, max_batch: int = 64, max_wait: float = 0.005,
+                 queue_size: int = 4096, index=None, features=None):
+        self.registry = registry
+        self.store = store
+        self.index = index
+        self.features = features
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.table = pd.DataFrame(columns=PREDICTION_COLUMNS).set_index('SYMBOL')
+        self.scored_count = 0
+        self.skipped_count = 0
+        self.dropped_count = 0
+        self._last_rows = {}
+        self._scored = []
+        self._model_version = None
+        self.last_latency: Optional[float] = None  # Seconds from submit to publish
+        self._thread: Optional[threading.Thread] = None
+
+    def seed(self, df: pd.DataFrame):
+        """Start from an existing prediction table (e.g. one loaded at startup)"""
+        if df is not None and not df.empty:
+            self.table = df[PREDICTION_COLUMNS].set_index('SYMBOL')
+            if self.index is not None:
+                self.index.reset(df)
+
+    def submit(self, row: QuoteRow, block: bool = True) -> bool:
+        """Queue a quote for scoring; False if it was unchanged or (non-blocking) the queue was full"""
+        if self._last_rows.get(row.SYMBOL) == row:
+            self.skipped_count += 1  # Quote unchanged since it was last scored
+            return False
+        self._last_rows[row.SYMBOL] = row
+        try:
+            self.queue.put((time.perf_counter(), row), block=block)
+        except queue.Full:
+            self._last_rows.pop(row.SYMBOL, None)  # Not scored, so let the next quote through
+            self.dropped_count += 1
+            STREAM_DROPPED.inc()
+            return False
+        return True
+
+    def submit_nowait(self, row: QuoteRow) -> bool:
+        """``submit`` for callers on an event loop: drops the row instead of blocking"""
+        return self.submit(row, block=False)
+
+    def drain_scored(self) -> pd.DataFrame:
+        """Rows scored since the previous call, latest per symbol"""
+        scored, self._scored = self._scored, []
+        if not scored:
+            return pd.DataFrame(columns=PREDICTION_COLUMNS)
+        return pd.concat(scored).drop_duplicates('SYMBOL', keep='last')[PREDICTION_COLUMNS]
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="micro-batch-predictor", daemon=True)
+            self._thread.start()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted row has been scored and published"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = batch[0][0] + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self.queue.get(timeout=max(remaining, 0)) if remaining > 0
+                                 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except Exception as e:
+                logger.error(f"Micro-batch prediction error: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _flush(self, batch):
+        quotes = pd.DataFrame([row for _, row in batch], columns=COLUMNS)
+        if self.features is not None:
+            self.features.update_frame(quotes)  # Ticks count whether or not a model is loaded
+        loaded = self.registry.get()
+        if loaded is None:
+            logger.error("Prediction model not found")
+            for _, row in batch:
+                self._last_rows.pop(row.SYMBOL, None)  # Let them through again once a model loads
+            return
+        if loaded.info.version != self._model_version:
+            if self._model_version is not None:
+                self._last_rows.clear()  # A new model re-scores every symbol on its next quote
+            self._model_version = loaded.info.version
+
+        df = quotes.dropna()
+        if df.empty:
+            return
+        df = df.drop_duplicates('SYMBOL', keep='last')
+        with stage_timer('predict'):
+            scoring = df[['SYMBOL'] + FEATURE_COLUMNS]
+            if needs_rolling(loaded.engine.columns):
+                scoring = self.features.attach(scoring, loaded.engine.columns)
+            df['PREDICTED_PROFIT'] = loaded.engine.score_frame(scoring)
+
+        fresh = df.set_index('SYMBOL')
+        kept = self.table[~self.table.index.isin(fresh.index)]
+        self.table = pd.concat([kept, fresh]) if not kept.empty else fresh
+        self.store.publish("predictions", self.table.reset_index())
+        if self.index is not None:
+            self.index.update_frame(df)
+        self._scored.append(df)
+
+        self.scored_count += len(fresh)
+        self.last_latency = time.perf_counter() - batch[0][0]
@@ -0,0 +1,100 @@
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UniverseDiff(NamedTuple):
+    version: int
+    added: List[str]
+    removed: List[str]
+
+
+def read_symbols(path: str) -> List[str]:
+    """Unique, interned symbols from the SYMBOL column of ``path``, in file order"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        column = header.index('SYMBOL') if 'SYMBOL' in header else 0
+        seen = set()
+        symbols = []
+        for row in reader:
+            if len(row) <= column:
+                continue
+            sym = row[column].strip()
+            if sym and sym not in seen:
+                seen.add(sym)
+                symbols.append(sys.intern(sym))
+    return symbols
+
+
+class SymbolUniverse:
+    """The symbol list, loaded once and reloaded only when the file changes.
+
+    Symbols are held as an interned object array plus a symbol -> position
+    dictionary, so downstream stages can address rows by integer position.
+    ``refresh()`` stats the file at most once per ``check_interval`` seconds
+    and returns a ``UniverseDiff`` when the list actually changed.
+    """
+
+    def __init__(self, path: str = "symbols.csv", check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.symbols = np.empty(0, dtype=object)
+        self.index: Dict[str, int] = {}
+        self._list: List[str] = []
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    def __contains__(self, sym: str) -> bool:
+        return sym in self.index
+
+    def as_list(self) -> List[str]:
+        """The symbols as a list (shared; do not mutate)"""
+        self.refresh()
+        return self._list
+
+    def refresh(self, force: bool = False) -> Optional[UniverseDiff]:
+        """Reload if the file changed since the last load; the diff, or None"""
+        now = time.monotonic()
+        if not force and self._list and now - self._last_check < self.check_interval:
+            return None
+        with self._lock:
+            self._last_check = now
+            stat = os.stat(self.path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            if stat_key == self._stat_key:
+                return None
+            symbols = read_symbols(self.path)
+            self._stat_key = stat_key
+            if symbols == self._list:
+                return None  # Touched but unchanged
+
+            current = set(symbols)
+            diff = UniverseDiff(self.version + 1,
+                                [s for s in symbols if s not in self.index],
+                                [s for s in self._list if s not in current])
+            self._list = symbols
+            self.symbols = np.array(symbols, dtype=object)
+            self.index = {s: i for i, s in enumerate(symbols)}
+            self.version = diff.version
+        logger.info(f"Symbol universe v{diff.version}: {len(symbols)} symbols "
+                    f"(+{len(diff.added)} / -{len(diff.removed)})")
+        return diff
+
+    def positions(self, symbols: Iterable[str]) -> np.ndarray:
+        """Row positions of ``symbols`` in the universe; -1 for unknown ones"""
+        index = self.index
+        return np.fromiter((index.get(s, -1) for s in symbols), dtype=np.intp)
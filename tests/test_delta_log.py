@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import delta_log
+from delta_log import DeltaLogReader, DeltaLogWriter, apply_records, decode_records, encode_record
+
+COLUMNS = ['OPEN', 'LAST']
+
+
+def frame(symbols, start=1.0):
+    values = np.arange(len(symbols) * len(COLUMNS), dtype=np.float64).reshape(-1, len(COLUMNS)) + start
+    return pd.DataFrame({'SYMBOL': symbols, 'OPEN': values[:, 0], 'LAST': values[:, 1]})
+
+
+def test_record_round_trip():
+    df = frame(['RELIANCE', 'TCS', 'M&M'])
+    df.loc[1, 'LAST'] = np.nan
+    payload = encode_record('predictions', 7, df, COLUMNS, published_at=123.5)
+    records, consumed = decode_records(payload + b'\0' * 4)  # Trailing bytes of a partial header
+
+    assert consumed == len(payload)
+    [record] = records
+    assert (record.kind, record.seq, record.published_at) == ('predictions', 7, 123.5)
+    assert record.symbols == ['RELIANCE', 'TCS', 'M&M']
+    np.testing.assert_array_equal(record.values, df[COLUMNS].to_numpy())
+
+
+def test_partial_record_is_left_for_the_next_read():
+    payload = encode_record('live', 1, frame(['A', 'B']), COLUMNS)
+    records, consumed = decode_records(payload[:-1])
+    assert records == [] and consumed == 0
+
+
+def test_corrupt_record_raises():
+    with pytest.raises(ValueError):
+        decode_records(b'X' * 64)
+
+
+def test_apply_records_upserts_by_symbol():
+    base = frame(['A', 'B'])
+    first = decode_records(encode_record('live', 1, frame(['B', 'C'], start=100.0), COLUMNS))[0]
+    second = decode_records(encode_record('live', 2, frame(['C'], start=500.0), COLUMNS))[0]
+    out = apply_records(base, first + second).set_index('SYMBOL')
+
+    assert list(out.index) == ['A', 'B', 'C']
+    assert out.loc['A', 'OPEN'] == 1.0
+    assert out.loc['B', 'OPEN'] == 100.0
+    assert out.loc['C', 'LAST'] == 501.0  # Later record wins
+
+
+def test_reader_tails_appends(tmp_path):
+    path = str(tmp_path / 'deltas.bin')
+    writer, reader = DeltaLogWriter(path), DeltaLogReader(path)
+    assert reader.poll() == (False, [])
+
+    writer.start_epoch(4, 9)
+    writer.append('live', frame(['A']), COLUMNS)
+    new_epoch, records = reader.poll()
+    assert new_epoch and reader.epoch == {'live': 4, 'predictions': 9}
+    assert [r.symbols for r in records] == [['A']]
+
+    assert reader.poll() == (False, [])
+    writer.append('predictions', frame(['B']), COLUMNS)
+    new_epoch, records = reader.poll()
+    assert not new_epoch and [(r.kind, r.symbols) for r in records] == [('predictions', ['B'])]
+
+
+def test_reader_that_missed_an_epoch_starts_over(tmp_path, monkeypatch):
+    # Atomic replaces can hand the log its old inode back; rewrite in place to force that
+    def write_in_place(path, data, **kwargs):
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.write(data)
+            f.truncate()
+
+    monkeypatch.setattr(delta_log, 'atomic_write_bytes', write_in_place)
+    path = str(tmp_path / 'deltas.bin')
+    writer, reader = DeltaLogWriter(path), DeltaLogReader(path)
+    writer.start_epoch(1, 1)
+    writer.append('live', frame(['A']), COLUMNS)
+    reader.poll()
+
+    writer.start_epoch(2, 2)
+    writer.start_epoch(3, 3)
+    writer.append('live', frame(['D', 'E', 'F']), COLUMNS)
+
+    new_epoch, records = reader.poll()
+    assert new_epoch and reader.epoch == {'live': 3, 'predictions': 3}
+    assert [r.symbols for r in records] == [['D', 'E', 'F']]
+
+
+def test_append_without_an_epoch_is_a_no_op(tmp_path):
+    writer = DeltaLogWriter(str(tmp_path / 'deltas.bin'))
+    assert writer.append('live', frame(['A']), COLUMNS) == 0
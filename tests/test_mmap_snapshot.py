@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from mmap_snapshot import MmapSnapshotReader, read_header, write_snapshot
+from quote_parser import COLUMNS
+
+
+def quotes(symbols, start=100.0):
+    values = np.arange(len(symbols) * 5, dtype=np.float64).reshape(-1, 5) + start
+    df = pd.DataFrame(values, columns=COLUMNS[1:])
+    df.insert(0, 'SYMBOL', symbols)
+    return df
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'live.snap')
+    df = quotes(['RELIANCE', 'M&M', 'TCS'])
+    df.loc[2, 'HIGH'] = np.nan
+    assert write_snapshot(path, df) == 1
+
+    snap = MmapSnapshotReader(path).read()
+    assert snap.seq == 1 and snap.columns == COLUMNS[1:]
+    assert snap.symbol_index() == {'RELIANCE': 0, 'M&M': 1, 'TCS': 2}
+    assert not snap.values.flags.writeable  # A view of the mapping, not a copy
+    pd.testing.assert_frame_equal(snap.to_frame(), df)
+
+
+def test_seq_increments_and_reader_follows_replacements(tmp_path):
+    path = str(tmp_path / 'live.snap')
+    write_snapshot(path, quotes(['A', 'B']))
+    reader = MmapSnapshotReader(path)
+    first = reader.read()
+    assert reader.read() is first  # Unchanged file: no remap
+
+    assert write_snapshot(path, quotes(['A', 'B', 'C'], start=1.0)) == 2
+    second = reader.read()
+    assert second.seq == 2 and len(second.symbols) == 3
+    assert first.values[0, 0] == 100.0  # Earlier views keep the old file's contents
+    assert read_header(path)[:3] == (2, 3, 5)
+
+
+def test_explicit_seq_and_extra_columns(tmp_path):
+    path = str(tmp_path / 'predictions.snap')
+    df = quotes(['A']).assign(PREDICTED_PROFIT=1.5)
+    write_snapshot(path, df, COLUMNS[1:] + ['PREDICTED_PROFIT'], seq=41)
+    snap = MmapSnapshotReader(path).read()
+    assert snap.seq == 41 and snap.columns[-1] == 'PREDICTED_PROFIT'
+    assert snap.values[0, -1] == 1.5
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / 'live.snap')
+    write_snapshot(path, quotes([]))
+    assert MmapSnapshotReader(path).read().to_frame().empty
+
+
+def test_missing_file_reads_as_none(tmp_path):
+    assert MmapSnapshotReader(str(tmp_path / 'absent.snap')).read() is None
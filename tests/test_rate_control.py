@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from fetchNSEdata import fetch_nse_live_data
+from rate_control import AdaptiveRateController, backoff_delay
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from stub_server import StubQuoteServer  # noqa: E402
+
+
+def outcomes(controller, *results):
+    async def run():
+        for ok, latency, throttled in results:
+            await controller.acquire()
+            await controller.release(ok, latency, throttled)
+    asyncio.run(run())
+
+
+def test_healthy_responses_ramp_up():
+    controller = AdaptiveRateController(rate=1000.0, max_rate=2000.0, concurrency=4, max_concurrency=64)
+    outcomes(controller, *[(True, 0.01, False)] * 40)
+    assert controller.rate > 1000.0 and controller.limit > 4
+    assert controller.backoffs == 0
+
+
+def test_congestion_cuts_once_per_cooldown():
+    controller = AdaptiveRateController(rate=1000.0, max_rate=2000.0, concurrency=32, cooldown=60.0)
+    outcomes(controller, (False, 0.01, True), (False, 0.01, True), (True, 5.0, False))
+    assert controller.backoffs == 1  # A burst of failures is one congestion signal
+    assert controller.rate == pytest.approx(500.0) and controller.limit == 16
+    assert (controller.failures, controller.throttled, controller.successes) == (2, 2, 1)
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    delays = [backoff_delay(attempt, base=0.5, cap=2.0) for attempt in range(8) for _ in range(20)]
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_sweeps_against_a_throttling_stub():
+    # Starts at 100 req/s against a 60 req/s limit: every symbol must still arrive, with the
+    # controller backing off and the sustained rate settling under the throttle
+    throttle, symbols = 60, [f'SYM{i}' for i in range(180)]
+    controller = AdaptiveRateController()
+    with StubQuoteServer(latency=0.02, jitter=0.01, throttle_rps=throttle) as server:
+        for _ in range(2):
+            started = time.monotonic()
+            df = fetch_nse_live_data(symbols, output_path=None, snapshot_path=None,
+                                     base_url=server.base_url, controller=controller)
+            achieved = len(df) / (time.monotonic() - started)
+            assert sorted(df['SYMBOL']) == sorted(symbols)
+            assert not df[['OPEN', 'LAST']].isna().any().any()
+            assert 0.5 * throttle < achieved <= 1.1 * throttle
+    assert server.throttled > 0 and controller.backoffs > 0
+    assert controller.throttled == server.throttled
+    assert controller.successes == 2 * len(symbols)
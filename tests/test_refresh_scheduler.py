@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from quote_parser import COLUMNS
+from refresh_scheduler import RefreshScheduler
+
+
+def quotes(symbols, last=100.0):
+    df = pd.DataFrame({c: [last] * len(symbols) for c in COLUMNS[1:]})
+    df.insert(0, 'SYMBOL', list(symbols))
+    return df
+
+
+def run(scheduler, cycles, interval=10.0, start=0.0):
+    seen_at = {}
+    for i in range(cycles):
+        now = start + i * interval
+        shard = scheduler.next_shard(now)
+        scheduler.merge(quotes(shard), now)
+        for symbol in shard:
+            seen_at.setdefault(symbol, []).append(now)
+    return seen_at
+
+
+def test_every_symbol_is_refreshed_within_the_age_bound():
+    universe = [f'S{i}' for i in range(2037)]
+    scheduler = RefreshScheduler(shard_size=80)
+    scheduler.set_universe(universe)
+    interval = 10.0
+    bound = scheduler.max_age_bound(interval)
+    cycles = 3 * math.ceil(len(universe) / scheduler.rotation_slots)
+    seen_at = run(scheduler, cycles, interval)
+
+    assert set(seen_at) == set(universe)
+    for times in seen_at.values():
+        assert times[0] < bound
+        assert max(np.diff(times), default=0.0) <= bound
+
+
+def test_priority_slots_go_to_never_refreshed_symbols_first():
+    scheduler = RefreshScheduler(shard_size=10, priority_fraction=0.2)
+    scheduler.set_universe([f'S{i}' for i in range(100)])
+    first = scheduler.next_shard(0.0)
+    assert first[:8] == [f'S{i}' for i in range(8)]
+    assert len(set(first)) == 10 and not set(first[8:]) & set(first[:8])
+
+
+def test_small_universe_is_fetched_whole():
+    scheduler = RefreshScheduler(shard_size=10)
+    scheduler.set_universe(['A', 'B'])
+    assert scheduler.next_shard() == ['A', 'B']
+
+
+def test_merge_reports_only_new_or_moved_rows():
+    scheduler = RefreshScheduler(shard_size=10)
+    scheduler.set_universe(['A', 'B', 'C'])
+    snapshot = scheduler.merge(quotes(['C', 'A', 'UNKNOWN']), now=1.0)
+    assert list(snapshot['SYMBOL']) == ['A', 'C']  # Universe order, unknown symbols ignored
+    assert list(scheduler.changes()['SYMBOL']) == ['A', 'C']
+
+    moved = pd.concat([quotes(['A']), quotes(['C'], last=101.0)], ignore_index=True)
+    scheduler.merge(moved, now=2.0)
+    assert list(scheduler.changes()['SYMBOL']) == ['C']
+    assert scheduler.ages(now=5.0) == {'A': 3.0, 'C': 3.0}
+
+
+def test_seed_restores_rows_without_reporting_changes():
+    scheduler = RefreshScheduler(shard_size=10)
+    scheduler.set_universe(['A', 'B'])
+    scheduler.seed(quotes(['B']), refreshed_at=50.0)
+    assert scheduler.changes().empty
+    assert list(scheduler.snapshot()['SYMBOL']) == ['B']
+    assert scheduler.ages(now=60.0) == {'B': 10.0}
+
+
+def test_set_universe_keeps_state_and_resumes_rotation():
+    scheduler = RefreshScheduler(shard_size=4, priority_fraction=0.0)
+    scheduler.set_universe(['A', 'B', 'C', 'D', 'E', 'F'])
+    scheduler.merge(quotes(scheduler.next_shard(0.0)), now=0.0)  # A-D; cursor now at E
+    scheduler.set_universe(['Z', 'E', 'F', 'A', 'B'])
+    assert list(scheduler.snapshot()['SYMBOL']) == ['A', 'B']
+    assert scheduler.next_shard(1.0) == ['E', 'F', 'A', 'B']
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from replay import PRICE_COLUMNS, build_panel, evaluate, realised_moves
+
+
+def ticks(rows):
+    """Ticks from (seconds, symbol, LAST) with every other price column set to LAST"""
+    frame = pd.DataFrame(rows, columns=['seconds', 'SYMBOL', 'LAST'])
+    frame['TS'] = pd.Timestamp('2026-10-12 09:15') + pd.to_timedelta(frame.pop('seconds'), unit='s')
+    for column in PRICE_COLUMNS:
+        frame[column] = frame['LAST']
+    return frame
+
+
+def test_moves_need_a_fresh_quote_at_both_ends():
+    # A quotes in buckets 0, 1 and 3; B only in bucket 0, so its price is carried forward
+    panel = build_panel(ticks([(0, 'A', 10.0), (0, 'B', 5.0), (20, 'A', 11.0), (60, 'A', 14.0)]))
+    realised = realised_moves(panel, 1)
+    a, b = list(panel.symbols).index('A'), list(panel.symbols).index('B')
+    assert realised[0, a] == 1.0
+    assert np.isnan(realised[1, a])  # Nothing new in bucket 2
+    assert np.isnan(realised[2, a])  # Bucket 2 is carried forward
+    assert np.isnan(realised[:, b]).all()
+
+    realised = realised_moves(panel, 2)
+    assert realised[1, a] == 3.0  # The bucket 3 quote lands inside (1, 3]
+    assert realised[0, a] == 1.0
+
+
+def test_evaluate_skips_carried_forward_prices():
+    panel = build_panel(ticks([(0, 'A', 10.0), (0, 'B', 5.0), (20, 'A', 11.0), (40, 'A', 12.0)]))
+    report = evaluate(panel, np.ones(panel.values.shape[:2]), horizon=1)
+    assert report.summary['observations'] == 2
+
+
+@pytest.mark.parametrize('horizon', [0, -1])
+def test_horizon_must_be_positive(horizon):
+    panel = build_panel(ticks([(0, 'A', 10.0), (20, 'A', 11.0)]))
+    with pytest.raises(ValueError):
+        evaluate(panel, np.ones(panel.values.shape[:2]), horizon=horizon)
@@ -0,0 +1,70 @@
+import os
+import pickle
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, PoissonRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from scoring import FEATURE_COLUMNS, ScoringEngine, feature_matrix
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def quotes():
+    return pd.read_csv(os.path.join(ROOT, 'nse_live.csv'))
+
+
+@pytest.fixture
+def shipped_model():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # Pickled with an older scikit-learn
+        with open(os.path.join(ROOT, 'profit_prediction_model.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+
+def test_shipped_model_matches_predict(shipped_model, quotes):
+    engine = ScoringEngine(shipped_model)
+    assert engine.is_linear
+
+    # What safe_predict_profit did before: fill NaNs with column means, then predict
+    features = quotes[FEATURE_COLUMNS].fillna(quotes[FEATURE_COLUMNS].mean())
+    expected = shipped_model.predict(features)
+    np.testing.assert_allclose(engine.score_frame(quotes), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_fitted_without_feature_names():
+    rng = np.random.default_rng(1)
+    X = rng.uniform(10, 3000, size=(500, len(FEATURE_COLUMNS)))
+    model = LinearRegression().fit(X, X @ rng.normal(size=len(FEATURE_COLUMNS)) + 3.0)
+    engine = ScoringEngine(model)
+    assert engine.is_linear
+    np.testing.assert_allclose(engine.score(X), model.predict(X), rtol=1e-9)
+
+
+def test_nonlinear_model_falls_back_to_predict(quotes):
+    X = feature_matrix(quotes)
+    model = DecisionTreeRegressor(max_depth=3, random_state=0).fit(X, X[:, -1] - X[:, 3])
+    engine = ScoringEngine(model)
+    assert not engine.is_linear
+    np.testing.assert_array_equal(engine.score_frame(quotes), model.predict(X))
+
+
+def test_linear_attributes_with_nonlinear_predict_fall_back():
+    # A GLM exposes coef_/intercept_ but predicts exp(X @ coef + intercept)
+    rng = np.random.default_rng(2)
+    X = rng.uniform(0, 1, size=(200, len(FEATURE_COLUMNS)))
+    model = PoissonRegressor().fit(X, rng.poisson(3.0, size=200))
+    engine = ScoringEngine(model)
+    assert not engine.is_linear
+    np.testing.assert_allclose(engine.score(X), model.predict(X))
+
+
+def test_feature_matrix_fills_nans_with_column_means():
+    df = pd.DataFrame({c: [1.0, np.nan, 3.0] for c in FEATURE_COLUMNS})
+    X = feature_matrix(df)
+    assert X.flags['C_CONTIGUOUS'] and X.dtype == np.float64
+    np.testing.assert_array_equal(X[1], np.full(len(FEATURE_COLUMNS), 2.0))
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from topk_index import RankingIndex
+
+
+def brute_force(state, key, k):
+    return [s for s, _ in sorted(state.items(), key=lambda item: key(item[1]))[:k]]
+
+
+def test_rankings_match_a_full_sort_under_random_updates():
+    rng = np.random.default_rng(0)
+    symbols = [f'S{i}' for i in range(200)]
+    index = RankingIndex(k=7)
+    state = {}  # symbol -> (predicted, change_pct)
+    for _ in range(5000):
+        symbol = symbols[rng.integers(len(symbols))]
+        if rng.random() < 0.05:
+            index.remove(symbol)
+            state.pop(symbol, None)
+            continue
+        predicted = float(rng.normal()) if rng.random() > 0.02 else float('nan')
+        prevclose = float(rng.uniform(10, 1000))
+        last = prevclose * (1 + float(rng.normal(scale=0.05)))
+        index.update(symbol, predicted, last, prevclose)
+        if np.isnan(predicted):
+            state.pop(symbol, None)
+        else:
+            state[symbol] = (predicted, (last - prevclose) / prevclose * 100)
+
+    assert len(index) == len(state)
+    assert [r.SYMBOL for r in index.top()] == brute_force(state, lambda v: -v[0], 7)
+    assert [r.SYMBOL for r in index.bottom()] == brute_force(state, lambda v: v[0], 7)
+    assert [r.SYMBOL for r in index.movers()] == brute_force(state, lambda v: -abs(v[1]), 7)
+    assert len(index._top.heap) <= 2 * len(index) + 64 + 1  # Compaction keeps stale entries bounded
+
+    summary = index.summary()
+    predictions = [v[0] for v in state.values()]
+    assert summary['count'] == len(state)
+    assert np.isclose(summary['mean'], np.mean(predictions))
+    assert summary['max'] == max(predictions) and summary['min'] == min(predictions)
+
+
+def test_reading_does_not_consume_entries():
+    index = RankingIndex(k=2)
+    for symbol, predicted in (('A', 1.0), ('B', 3.0), ('C', 2.0)):
+        index.update(symbol, predicted, 10.0, 10.0)
+    assert [r.SYMBOL for r in index.top()] == ['B', 'C']
+    assert [r.SYMBOL for r in index.top(3)] == ['B', 'C', 'A']
+    assert index.top(1)[0].PREDICTED_PROFIT == 3.0
+
+
+def test_reset_reindexes_a_frame():
+    index = RankingIndex(k=3)
+    index.update('OLD', 9.0, 1.0, 1.0)
+    frame = pd.DataFrame({'SYMBOL': ['A', 'B'], 'LAST': [110.0, 95.0], 'PREVCLOSE': [100.0, 100.0],
+                          'PREDICTED_PROFIT': [0.5, -0.5]})
+    index.reset(frame)
+    assert [r.SYMBOL for r in index.top()] == ['A', 'B']
+    assert [r.SYMBOL for r in index.movers()] == ['A', 'B']
+    assert index.top()[0].CHANGE_PCT == 10.0
+
+    index.reset()
+    assert len(index) == 0 and index.summary()['mean'] is None
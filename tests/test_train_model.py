@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from replay import build_panel, evaluate
+from test_replay import ticks
+from train_model import session_rows
+
+
+@pytest.mark.parametrize('horizon', [1, 2])
+def test_rows_match_the_moves_replay_scores(horizon):
+    panel = build_panel(ticks([(0, 'A', 10.0), (0, 'B', 5.0), (20, 'A', 11.0), (40, 'B', 6.0),
+                               (60, 'A', 14.0), (80, 'A', 13.0), (80, 'B', 6.5)]))
+    rows, per_bucket = session_rows(panel, horizon)
+    report = evaluate(panel, np.ones(panel.values.shape[:2]), horizon=horizon)
+    assert len(rows) == per_bucket.sum() == report.summary['observations']
+    assert np.isclose(rows[:, -1].sum(), report.totals['r'])
+
+
+def test_short_session_has_no_rows():
+    rows, per_bucket = session_rows(build_panel(ticks([(0, 'A', 10.0)])), 1)
+    assert rows.shape == (0, 6) and not len(per_bucket)
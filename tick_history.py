@@ -0,0 +1,137 @@
+import logging
+import os
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from quote_parser import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+TICK_SCHEMA = pa.schema(
+    [('TS', pa.timestamp('us')), ('SYMBOL', pa.string())]
+    + [(col, pa.float64()) for col in COLUMNS[1:]]
+)
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+COMPACTED_NAME = 'ticks.parquet'
+
+
+class TickHistory:
+    """Append-only Parquet store of every fetched quote.
+
+    Each fetch cycle is appended as its own small Parquet file under
+    ``<root>/date=YYYY-MM-DD/``, sorted by symbol so row-group statistics
+    are selective. ``compact()`` rewrites a finished day into a single
+    ``ticks.parquet`` holding one row group per cycle. Scans go through
+    ``pyarrow.dataset``, so date, symbol and time predicates are pushed
+    down to partitions and row groups rather than loading everything.
+    """
+
+    def __init__(self, root: str = "tick_history"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _day_dir(self, day: date) -> str:
+        return os.path.join(self.root, f"date={day.isoformat()}")
+
+    def append(self, df: pd.DataFrame, ts: Optional[datetime] = None) -> Optional[str]:
+        """Write one fetch cycle as a new partition file; returns its path"""
+        if df is None or df.empty:
+            return None
+        ts = ts or datetime.now()
+        frame = df[COLUMNS].sort_values('SYMBOL')
+        frame.insert(0, 'TS', pd.Timestamp(ts))
+        table = pa.Table.from_pandas(frame, schema=TICK_SCHEMA, preserve_index=False)
+
+        day_dir = self._day_dir(ts.date())
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"cycle-{ts.strftime('%H%M%S%f')}.parquet")
+        tmp_path = os.path.join(day_dir, f"_{os.path.basename(path)}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def compact(self, day: date) -> Optional[str]:
+        """Fold a day's cycle files into one file with a row group per cycle"""
+        day_dir = self._day_dir(day)
+        if not os.path.isdir(day_dir):
+            return None
+        cycles = sorted(f for f in os.listdir(day_dir) if f.startswith('cycle-'))
+        if not cycles:
+            return None
+
+        target = os.path.join(day_dir, COMPACTED_NAME)
+        tmp_path = os.path.join(day_dir, f"_{COMPACTED_NAME}.tmp")
+        with pq.ParquetWriter(tmp_path, TICK_SCHEMA) as writer:
+            if os.path.exists(target):
+                existing = pq.ParquetFile(target)
+                for i in range(existing.num_row_groups):
+                    writer.write_table(existing.read_row_group(i))
+            for name in cycles:
+                table = pq.read_table(os.path.join(day_dir, name), schema=TICK_SCHEMA)
+                writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        os.replace(tmp_path, target)
+        for name in cycles:
+            os.remove(os.path.join(day_dir, name))
+        logger.info(f"Compacted {len(cycles)} tick cycles into {target}")
+        return target
+
+    def days(self) -> List[date]:
+        """Every day that has a partition, oldest first"""
+        return sorted(date.fromisoformat(entry[len('date='):])
+                      for entry in os.listdir(self.root) if entry.startswith('date='))
+
+    def compact_closed_days(self, today: Optional[date] = None) -> List[str]:
+        """Compact every day partition older than ``today``"""
+        today = today or date.today()
+        compacted = []
+        for day in self.days():
+            if day < today:
+                path = self.compact(day)
+                if path:
+                    compacted.append(path)
+        return compacted
+
+    def _filter(self, symbols, start, end):
+        expr = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if start is not None:
+            start = pd.Timestamp(start)
+            expr = both(expr, ds.field('date') >= start.date().isoformat())
+            expr = both(expr, ds.field('TS') >= pa.scalar(start.to_pydatetime(), pa.timestamp('us')))
+        if end is not None:
+            end = pd.Timestamp(end)
+            expr = both(expr, ds.field('date') <= end.date().isoformat())
+            expr = both(expr, ds.field('TS') < pa.scalar(end.to_pydatetime(), pa.timestamp('us')))
+        if symbols is not None:
+            expr = both(expr, ds.field('SYMBOL').isin(list(symbols)))
+        return expr
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(self.root, format='parquet', schema=TICK_SCHEMA.append(pa.field('date', pa.string())),
+                          partitioning=PARTITIONING)
+
+    def scan(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+             columns: Optional[Sequence[str]] = None, batch_size: int = 65536) -> Iterator[pa.RecordBatch]:
+        """Stream record batches for ``symbols`` with ``start <= TS < end``"""
+        columns = list(columns) if columns else TICK_SCHEMA.names
+        scanner = self.dataset().scanner(columns=columns, filter=self._filter(symbols, start, end),
+                                         batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch
+
+    def read(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Materialise a (filtered) range scan as a DataFrame ordered by time"""
+        columns = list(columns) if columns else TICK_SCHEMA.names
+        table = self.dataset().to_table(columns=columns, filter=self._filter(symbols, start, end))
+        df = table.to_pandas()
+        return df.sort_values('TS', kind='stable').reset_index(drop=True) if 'TS' in df.columns else df
@@ -0,0 +1,148 @@
+import heapq
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+
+class Ranked(NamedTuple):
+    SYMBOL: str
+    LAST: float
+    PREDICTED_PROFIT: float
+    CHANGE_PCT: float
+
+
+class _LazyHeap:
+    """Min-heap of (key, stamp, symbol) whose stale entries are skipped on read"""
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, key: float, stamp: int, symbol: str):
+        heapq.heappush(self.heap, (key, stamp, symbol))
+
+    def first(self, k: int, is_current) -> List[str]:
+        """The k smallest live symbols; O(k log n) plus the stale entries discarded"""
+        taken, result = [], []
+        while self.heap and len(result) < k:
+            entry = heapq.heappop(self.heap)
+            if is_current(entry[2], entry[1]):
+                taken.append(entry)
+                result.append(entry[2])
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return result
+
+    def rebuild(self, entries):
+        self.heap = list(entries)
+        heapq.heapify(self.heap)
+
+
+class RankingIndex:
+    """Top-K / bottom-K / biggest-mover rankings maintained as symbols are re-scored.
+
+    Each ranking is a heap with lazy deletion: re-scoring a symbol pushes a
+    new entry stamped with a fresh counter and leaves the old one in place,
+    to be discarded when it surfaces. An update is O(log n) per ranking, and
+    reading K entries is O(K log n). Heaps are compacted once stale entries
+    outnumber live ones. Count, mean, min and max of the predictions are kept
+    as running sums alongside.
+    """
+
+    def __init__(self, k: int = 5):
+        self.k = k
+        self.entries: Dict[str, tuple] = {}  # symbol -> (stamp, last, predicted, change_pct)
+        self._stamp = 0
+        self._top = _LazyHeap()      # key: -predicted
+        self._bottom = _LazyHeap()   # key: predicted
+        self._movers = _LazyHeap()   # key: -|change_pct|
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _is_current(self, symbol: str, stamp: int) -> bool:
+        entry = self.entries.get(symbol)
+        return entry is not None and entry[0] == stamp
+
+    def _discard(self, symbol: str):
+        previous = self.entries.pop(symbol, None)
+        if previous is not None:
+            self._sum -= previous[2]
+
+    def update(self, symbol: str, predicted: float, last: float, prevclose: float):
+        """Record a symbol's latest score; NaN scores just drop the symbol"""
+        with self._lock:
+            self._discard(symbol)
+            if predicted is None or math.isnan(predicted):
+                return
+            change = (last - prevclose) / prevclose * 100 if prevclose else 0.0
+            if math.isnan(change):
+                change = 0.0
+            self._stamp += 1
+            self.entries[symbol] = (self._stamp, last, predicted, change)
+            self._sum += predicted
+            self._top.push(-predicted, self._stamp, symbol)
+            self._bottom.push(predicted, self._stamp, symbol)
+            self._movers.push(-abs(change), self._stamp, symbol)
+            if len(self._top.heap) > 2 * len(self.entries) + 64:
+                self._compact()
+
+    def update_frame(self, df: pd.DataFrame):
+        """Fold in the scored rows of a frame with SYMBOL, LAST, PREVCLOSE, PREDICTED_PROFIT"""
+        for symbol, last, prev, predicted in zip(df['SYMBOL'], df['LAST'], df['PREVCLOSE'],
+                                                 df['PREDICTED_PROFIT']):
+            self.update(symbol, float(predicted), float(last), float(prev))
+
+    def remove(self, symbol: str):
+        with self._lock:
+            self._discard(symbol)
+
+    def reset(self, df: Optional[pd.DataFrame] = None):
+        """Drop everything, optionally re-indexing a full predictions frame"""
+        with self._lock:
+            self.entries.clear()
+            self._sum = 0.0
+            for heap in (self._top, self._bottom, self._movers):
+                heap.rebuild(())
+        if df is not None and not df.empty:
+            self.update_frame(df)
+
+    def _compact(self):
+        items = [(stamp, symbol, predicted, change)
+                 for symbol, (stamp, _, predicted, change) in self.entries.items()]
+        self._top.rebuild((-p, s, sym) for s, sym, p, _ in items)
+        self._bottom.rebuild((p, s, sym) for s, sym, p, _ in items)
+        self._movers.rebuild((-abs(c), s, sym) for s, sym, _, c in items)
+        self._sum = sum(p for _, _, p, _ in items)  # Drop accumulated rounding drift
+
+    def _ranked(self, symbols: List[str]) -> List[Ranked]:
+        return [Ranked(s, self.entries[s][1], self.entries[s][2], self.entries[s][3]) for s in symbols]
+
+    def top(self, k: Optional[int] = None) -> List[Ranked]:
+        with self._lock:
+            return self._ranked(self._top.first(k or self.k, self._is_current))
+
+    def bottom(self, k: Optional[int] = None) -> List[Ranked]:
+        with self._lock:
+            return self._ranked(self._bottom.first(k or self.k, self._is_current))
+
+    def movers(self, k: Optional[int] = None) -> List[Ranked]:
+        with self._lock:
+            return self._ranked(self._movers.first(k or self.k, self._is_current))
+
+    def summary(self) -> Dict[str, object]:
+        """JSON-friendly rankings and stats, as published to dashboards"""
+        top, bottom, movers = self.top(), self.bottom(), self.movers()
+        count = len(self.entries)
+        return {
+            'count': count,
+            'mean': self._sum / count if count else None,
+            'max': top[0].PREDICTED_PROFIT if top else None,
+            'min': bottom[0].PREDICTED_PROFIT if bottom else None,
+            'top': [r._asdict() for r in top],
+            'bottom': [r._asdict() for r in bottom],
+            'movers': [r._asdict() for r in movers],
+        }
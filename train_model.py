@@ -0,0 +1,276 @@
+"""Rebuild profit_prediction_model.pkl from recorded ticks.
+
+    python train_model.py tick_history --folds 5 --workers 4
+    python train_model.py history_csvs/ --start 2025-01-01 --horizon 3 --output profit_prediction_model.pkl
+
+Sessions are streamed one day at a time and bucketed onto the same virtual
+clock as replay.py. Every (bucket, symbol) with a new quote at t and
+another within (t, t + horizon] becomes a training row: the feature columns
+at t (with ``--features rolling``, also the indicators from features.py,
+rebuilt tick by tick as the service would) and the realised LAST move to
+t + horizon, exactly as replay.py scores it.
+Rows are spilled to a float64 file as they are built, and the time-series
+cross-validation folds run in a process pool that memory-maps that file,
+so no fold ships data through pickles. Every fit streams the file in
+fixed-size chunks, accumulating the normal equations, so memory stays flat
+however long the history. The final model is fitted on every row and
+written together with its metadata as the artifact the service's
+ModelRegistry loads and validates.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import TimeSeriesSplit
+
+from atomic_io import atomic_write_bytes
+from features import DEFAULT_CONFIG, SERVED_COLUMNS, needs_rolling
+from model_registry import ARTIFACT_FORMAT, validate_metadata
+from replay import ReplayPanel, build_panel, iter_sessions, panel_features, realised_moves
+from scoring import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 1 << 16  # Rows of the spilled set held in memory at once
+
+
+class TrainingSet(NamedTuple):
+    path: str                  # float64 rows of features followed by the label
+    n_rows: int
+    n_features: int
+    bucket_offsets: np.ndarray  # Row where each bucket starts, plus the total
+    start: pd.Timestamp
+    end: pd.Timestamp
+    sessions: int
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.n_rows, self.n_features + 1
+
+    def load(self) -> np.ndarray:
+        return np.memmap(self.path, dtype=np.float64, mode='r', shape=self.shape)
+
+
+def session_rows(panel: ReplayPanel, horizon: int,
+                 columns: Sequence[str] = FEATURE_COLUMNS) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows of features + label, rows per bucket) for one session's panel.
+
+    Cells whose quote at t or t + horizon is only carried forward get no row
+    (see ``replay.realised_moves``); they would teach the model zero moves.
+    """
+    y = realised_moves(panel, horizon)[:-horizon]
+    if not len(y):
+        return np.empty((0, len(columns) + 1)), np.zeros(0, dtype=np.int64)
+    X = panel_features(panel, columns)[:-horizon]
+    valid = ~np.isnan(X).any(axis=2) & ~np.isnan(y)
+    rows = np.concatenate([X[valid], y[valid][:, None]], axis=1)
+    return rows, valid.sum(axis=1)
+
+
+def build_training_set(source: str, path: str, start=None, end=None, interval: float = 20.0,
+                       horizon: int = 1, columns: Sequence[str] = FEATURE_COLUMNS) -> TrainingSet:
+    """Stream ``source`` session by session and spill labelled rows to ``path``"""
+    counts, n_rows, sessions = [], 0, 0
+    first = last = None
+    with open(path, 'wb') as f:
+        for ticks in iter_sessions(source, start, end):
+            panel = build_panel(ticks, interval)
+            rows, per_bucket = session_rows(panel, horizon, columns)
+            if not len(rows):
+                continue
+            f.write(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+            counts.append(per_bucket)
+            n_rows += len(rows)
+            sessions += 1
+            first = panel.times[0] if first is None else first
+            last = panel.times[-1]
+            logger.info(f"Session {panel.times[0].date()}: {len(ticks)} ticks -> {len(rows)} rows")
+    if not n_rows:
+        raise ValueError(f"No labelled rows could be built from {source}")
+    offsets = np.concatenate([[0], np.cumsum(np.concatenate(counts))])
+    return TrainingSet(path, n_rows, len(columns), offsets, first, last, sessions)
+
+
+def regression_metrics(y: np.ndarray, pred: np.ndarray) -> Dict[str, float]:
+    moved = y != 0
+    return {
+        'rows': int(len(y)),
+        'mae': float(np.abs(pred - y).mean()),
+        'rmse': float(np.sqrt(((pred - y) ** 2).mean())),
+        'r2': float(1 - ((y - pred) ** 2).sum() / ((y - y.mean()) ** 2).sum()) if len(y) > 1 else None,
+        'directional_accuracy': (float((np.sign(pred[moved]) == np.sign(y[moved])).mean())
+                                 if moved.any() else None),
+    }
+
+
+def fold_bounds(training_set: TrainingSet, folds: int, gap: int) -> List[Tuple[int, int, int]]:
+    """(train_stop, test_start, test_stop) row bounds of expanding-window folds.
+
+    Folds are cut on bucket boundaries with ``gap`` buckets between train and
+    test, so no training label looks into the test window.
+    """
+    offsets = training_set.bucket_offsets
+    n_buckets = len(offsets) - 1
+    if n_buckets <= folds + gap:
+        raise ValueError(f"{n_buckets} buckets are too few for {folds} folds")
+    splitter = TimeSeriesSplit(n_splits=folds, gap=gap)
+    return [(int(offsets[train[-1] + 1]), int(offsets[test[0]]), int(offsets[test[-1] + 1]))
+            for train, test in splitter.split(np.arange(n_buckets))]
+
+
+def fit_linear(data: np.ndarray, stop: int, chunk_rows: int = CHUNK_ROWS) -> LinearRegression:
+    """Least squares on rows [0, stop) of ``data`` (features then label), a chunk at a time.
+
+    Only the (features + 1)^2 cross-products are accumulated, shifted by the
+    first chunk's mean; the centred system is scaled to unit diagonal before
+    solving so that near-collinear price columns stay well conditioned.
+    Columns that only vary by rounding error get a zero coefficient.
+    """
+    shift = np.asarray(data[:min(stop, chunk_rows)]).mean(axis=0)
+    sums = np.zeros(data.shape[1])
+    gram = np.zeros((data.shape[1], data.shape[1]))
+    for a in range(0, stop, chunk_rows):
+        chunk = np.asarray(data[a:min(a + chunk_rows, stop)]) - shift
+        sums += chunk.sum(axis=0)
+        gram += chunk.T @ chunk
+    mean = sums / stop
+    centred = gram - stop * np.outer(mean, mean)
+    sxx, sxy = centred[:-1, :-1], centred[:-1, -1]
+    scale = np.sqrt(np.clip(np.diag(sxx), 0.0, None))
+    level = np.maximum(np.abs(shift[:-1] + mean[:-1]), 1.0)
+    varies = scale / np.sqrt(stop) > np.sqrt(np.finfo(np.float64).eps) * level
+    coef = np.zeros(len(scale))
+    if varies.any():
+        s = scale[varies]
+        system = sxx[np.ix_(varies, varies)] / np.outer(s, s)
+        coef[varies] = np.linalg.lstsq(system, sxy[varies] / s, rcond=None)[0] / s
+
+    model = LinearRegression()
+    model.coef_ = coef
+    model.intercept_ = float(shift[-1] + mean[-1] - (shift[:-1] + mean[:-1]) @ coef)
+    model.n_features_in_ = len(coef)
+    return model
+
+
+def predict_rows(model, data: np.ndarray, start: int, stop: int, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """Predictions for rows [start, stop) of ``data``, a chunk at a time"""
+    return np.concatenate([model.predict(np.asarray(data[a:min(a + chunk_rows, stop), :-1]))
+                           for a in range(start, stop, chunk_rows)])
+
+
+def _fit_fold(path: str, shape: Tuple[int, int], train_stop: int,
+              test_start: int, test_stop: int) -> Dict[str, float]:
+    """Fit on rows [0, train_stop) and score rows [test_start, test_stop) of the spilled set"""
+    data = np.memmap(path, dtype=np.float64, mode='r', shape=shape)
+    model = fit_linear(data, train_stop)
+    metrics = regression_metrics(np.asarray(data[test_start:test_stop, -1]),
+                                 predict_rows(model, data, test_start, test_stop))
+    metrics['train_rows'] = train_stop
+    return metrics
+
+
+def cross_validate(training_set: TrainingSet, folds: int = 5, gap: int = 1,
+                   workers: int = 0) -> List[Dict[str, float]]:
+    """Per-fold metrics, fitted in a process pool when ``workers`` > 0"""
+    bounds = fold_bounds(training_set, folds, gap)
+    args = [(training_set.path, training_set.shape) + b for b in bounds]
+    if workers <= 0:
+        return [_fit_fold(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+        return list(pool.map(_fit_fold, *zip(*args)))
+
+
+def _mean_metrics(results: List[Dict[str, float]]) -> Dict[str, float]:
+    keys = [k for k in results[0] if k not in ('rows', 'train_rows')]
+    return {k: float(np.mean([r[k] for r in results if r[k] is not None]))
+            if any(r[k] is not None for r in results) else None for k in keys}
+
+
+def write_artifact(path: str, model, metadata: Dict[str, Any]) -> str:
+    """Validate and atomically write the model artifact; returns its content hash"""
+    validate_metadata(model, metadata)
+    payload = pickle.dumps({'format': ARTIFACT_FORMAT, 'model': model, 'metadata': metadata})
+    atomic_write_bytes(path, payload, skip_unchanged=False)
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def train(source: str, output: str = "profit_prediction_model.pkl", start=None, end=None,
+          interval: float = 20.0, horizon: int = 1, folds: int = 5, workers: int = 0,
+          work_dir: str = None, write: bool = True,
+          columns: Sequence[str] = FEATURE_COLUMNS) -> Dict[str, Any]:
+    """Build the training set, cross-validate, fit on everything and write the artifact"""
+    fd, spill_path = tempfile.mkstemp(suffix='.f64', prefix='train-', dir=work_dir)
+    os.close(fd)
+    try:
+        training_set = build_training_set(source, spill_path, start, end, interval, horizon, columns)
+        logger.info(f"Training set: {training_set.n_rows} rows from {training_set.sessions} sessions "
+                    f"({training_set.start} to {training_set.end})")
+
+        results = cross_validate(training_set, folds, gap=horizon, workers=workers)
+        for i, r in enumerate(results):
+            logger.info(f"Fold {i + 1}/{len(results)}: {r}")
+
+        data = training_set.load()
+        model = fit_linear(data, training_set.n_rows)
+        metadata = {
+            'feature_names': list(columns),
+            'target': 'LAST move',
+            'horizon_buckets': horizon,
+            'interval_seconds': interval,
+            'training_window': {'start': training_set.start.isoformat(), 'end': training_set.end.isoformat(),
+                                'sessions': training_set.sessions, 'rows': training_set.n_rows},
+            'cv': {'folds': results, 'mean': _mean_metrics(results)},
+            'estimator': type(model).__name__,
+            'model_hash': hashlib.sha256(pickle.dumps(model)).hexdigest()[:12],
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'source': os.path.abspath(source),
+        }
+        if needs_rolling(columns):
+            metadata['feature_engine'] = dict(DEFAULT_CONFIG)
+        if write:
+            version = write_artifact(output, model, metadata)
+            logger.info(f"Wrote model {version} to {output}")
+        return metadata
+    finally:
+        os.remove(spill_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='tick history root, Parquet file, CSV file or directory of CSVs')
+    parser.add_argument('--output', default='profit_prediction_model.pkl')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--interval', type=float, default=20.0, help='virtual clock step in seconds')
+    parser.add_argument('--horizon', type=int, default=1, help='buckets ahead for the label')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processes for cross-validation (0 = in-process)')
+    parser.add_argument('--work-dir', default=None, help='directory for the spilled training set')
+    parser.add_argument('--features', choices=('raw', 'rolling'), default='raw',
+                        help='raw price columns only, or with the rolling indicators from features.py')
+    parser.add_argument('--dry-run', action='store_true', help='report CV metrics without writing the model')
+    args = parser.parse_args()
+    if args.horizon < 1:
+        parser.error("--horizon must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    metadata = train(args.source, args.output, args.start, args.end, args.interval, args.horizon,
+                     args.folds, args.workers, args.work_dir, write=not args.dry_run,
+                     columns=SERVED_COLUMNS if args.features == 'rolling' else FEATURE_COLUMNS)
+    print(json.dumps({k: v for k, v in metadata.items() if k != 'cv'} | {'cv': metadata['cv']['mean']},
+                     indent=2))
+
+
+if __name__ == '__main__':
+    main()